@@ -2,6 +2,9 @@
 A table drawing utility for Assetto Corsa.
 """
 
+# The font color of a new label.
+DEFAULT_COLOR = (1, 1, 1, 1)
+
 class ACTable(object):
 
     def __init__(self, ac, window):
@@ -13,33 +16,68 @@ class ACTable(object):
 
         self.cells = {}
 
+        # Every label ever created, by cell. Labels cannot be deleted, so
+        # they are kept and reused when the table is redrawn.
+        self.labelPool = {}
+        self.hiddenLabels = set()
+        self.listeners = set()
+
+        # The last text and colour sent to each label, to skip sending them
+        # again, and how many calls were sent or skipped.
+        self.texts = {}
+        self.colors = {}
+        self.callsIssued = 0
+        self.callsSuppressed = 0
+
 
     def draw(self):
         """
-        Initialise the data storage array and label array. We are required to
-        store cell data so that the cell information can be retrieved when
-        redrawing due to a font size change.
+        Lay out a label for every cell. Labels from earlier draws are reused
+        for the same cell and cleared as if they were new, labels are only
+        created when the table grows and those of cells which are no longer
+        in the table are hidden.
         """
         # if self.ac is unavailable then we must be in a test and cannot
         # proceed.
         if self.ac is None:
             return
 
-        # Delete all existing labels
-        for label in self.cells.values():
-            self.ac.setVisible(label, 0)
-
         self.cells = {}
 
         for i in range(self.nColumns):
             for j in range(self.nRows):
-                label = self.ac.addLabel(self.window, "")
+                label = self.labelPool.get((i, j))
+                if label is None:
+                    label = self.ac.addLabel(self.window, "")
+                    self.labelPool[(i, j)] = label
+                else:
+                    self._clearLabel(label)
+                    if label in self.hiddenLabels:
+                        self.ac.setVisible(label, 1)
+                        self.hiddenLabels.discard(label)
                 self.ac.setSize(label, self.columnWidths[i] * self.fontSize, self.fontSize)
                 self.ac.setPosition(label, *self._cellPosition(i, j))
                 self.ac.setFontSize(label, self.fontSize)
                 self.ac.setFontAlignment(label, self.columnAlignments[i])
                 self.cells[(i, j)] = label
 
+        for cell, label in self.labelPool.items():
+            if cell not in self.cells and label not in self.hiddenLabels:
+                self.ac.setVisible(label, 0)
+                self.hiddenLabels.add(label)
+
+
+    def _clearLabel(self, label):
+        """
+        Reset a reused label to the blank white text of a new label.
+        """
+        if self.texts.get(label, ""):
+            self.texts[label] = ""
+            self.ac.setText(label, "")
+        if self.colors.get(label, DEFAULT_COLOR) != DEFAULT_COLOR:
+            self.colors[label] = DEFAULT_COLOR
+            self.ac.setFontColor(label, *DEFAULT_COLOR)
+
 
     def setSize(self, nColumns, nRows):
         """
@@ -110,16 +148,39 @@ class ACTable(object):
 
     def setCellValue(self, text, iX, iY):
         """
-        Set the cell text at position iX,iY.
+        Set the cell text at position iX,iY. Nothing is sent to the game if
+        the cell already shows this text.
         """
-        self.ac.setText(self.getCellLabel(iX, iY), text)
+        label = self.getCellLabel(iX, iY)
+        if self.texts.get(label) == text:
+            self.callsSuppressed += 1
+            return
+        self.texts[label] = text
+        self.callsIssued += 1
+        self.ac.setText(label, text)
+
 
-    
     def setFontColor(self, r, g, b, s, iX, iY):
         """
-        Set the font color of the cell at iX,iY.
+        Set the font color of the cell at iX,iY. Nothing is sent to the game
+        if the cell already has this color.
         """
-        self.ac.setFontColor(self.getCellLabel(iX, iY), r, g, b, s)
+        label = self.getCellLabel(iX, iY)
+        color = (r, g, b, s)
+        if self.colors.get(label) == color:
+            self.callsSuppressed += 1
+            return
+        self.colors[label] = color
+        self.callsIssued += 1
+        self.ac.setFontColor(label, r, g, b, s)
+
+
+    def resetCallCounts(self):
+        """
+        Reset the counts of calls issued to and suppressed from the game.
+        """
+        self.callsIssued = 0
+        self.callsSuppressed = 0
 
 
     def getCellLabel(self, iX, iY):
@@ -130,4 +191,12 @@ class ACTable(object):
 
 
     def addOnClickedListener(self, iX, iY, callback):
-        self.ac.addOnClickedListener(self.getCellLabel(iX, iY), callback)
+        """
+        Call ``callback`` when the cell at iX,iY is clicked. Labels are
+        reused by redraws, so a listener is only added once.
+        """
+        label = self.getCellLabel(iX, iY)
+        if (label, callback) in self.listeners:
+            return
+        self.listeners.add((label, callback))
+        self.ac.addOnClickedListener(label, callback)
@@ -0,0 +1,19 @@
+"""
+Atomic file replacement, so that an interrupted write never leaves a
+truncated file behind.
+"""
+import os
+
+
+def atomicWrite(fileName, data):
+    """
+    Replace the content of ``fileName`` with ``data``, bytes or text. The data
+    is written to a temporary file which is then renamed over ``fileName``,
+    so readers see either the old or the new content.
+    """
+    tempFileName = fileName + ".tmp"
+    with open(tempFileName, "wb" if isinstance(data, bytes) else "w") as fd:
+        fd.write(data)
+        fd.flush()
+        os.fsync(fd.fileno())
+    os.replace(tempFileName, fileName)
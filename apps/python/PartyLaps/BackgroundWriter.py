@@ -0,0 +1,105 @@
+"""
+A background thread to keep file I/O off the render thread.
+"""
+import queue
+import threading
+import traceback
+
+
+class BackgroundWriter(object):
+    """
+    Run functions, typically file writes, one at a time on a background
+    thread.
+
+    Jobs are taken from a bounded queue. Callers must hand over snapshots of
+    the data to be written, as the job runs while the game keeps updating
+    the live state. Until ``start`` has been called jobs run synchronously,
+    which is what the tests rely on.
+
+    Submitting never makes the game wait: if the writer has fallen so far
+    behind that the queue is full, the job is dropped and counted in
+    ``dropped``.
+    """
+
+    _stop = object()
+
+    def __init__(self, log=None, maxJobs=64):
+        self.log = log
+        self.queue = queue.Queue(maxJobs)
+        self.thread = None
+        self.dropped = 0
+
+
+    def start(self):
+        """
+        Start the writer thread.
+        """
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run, name="PartyLaps writer")
+        self.thread.daemon = True
+        self.thread.start()
+
+
+    def submit(self, function, *args):
+        """
+        Queue ``function(*args)`` to be run on the writer thread. Return False
+        if the queue is full and the job was dropped, so that callers which
+        only queue one job at a time can queue it again later.
+        """
+        if self.thread is None:
+            self._call(function, args)
+            return True
+
+        try:
+            self.queue.put_nowait((function, args))
+        except queue.Full:
+            self.dropped += 1
+            # Logged once, logging every drop would only slow the game further
+            if self.dropped == 1 and self.log is not None:
+                self.log("PartyLaps: Background writer queue full, dropping jobs")
+            return False
+        return True
+
+
+    def flush(self):
+        """
+        Wait until every queued job has run. Only for shutting down, as this
+        blocks the game.
+        """
+        if self.thread is not None:
+            self.queue.join()
+
+
+    def close(self):
+        """
+        Run every queued job and stop the writer thread. Jobs submitted after
+        this run synchronously.
+        """
+        if self.thread is None:
+            return
+        self.queue.put((self._stop, ()))
+        self.thread.join()
+        self.thread = None
+        if self.dropped and self.log is not None:
+            self.log("PartyLaps: Background writer dropped %d jobs" % self.dropped)
+
+
+    def _run(self):
+        while True:
+            function, args = self.queue.get()
+            try:
+                if function is self._stop:
+                    return
+                self._call(function, args)
+            finally:
+                self.queue.task_done()
+
+
+    def _call(self, function, args):
+        try:
+            function(*args)
+        except Exception as e:
+            if self.log is not None:
+                self.log("PartyLaps: Error in background writer: %s" % e)
+                self.log(traceback.format_exc())
@@ -0,0 +1,190 @@
+"""
+A write-ahead journal of the laps and records set while driving, so that they
+survive a game crash.
+
+Recording only queues the record and hands it to the background writer,
+which packs, appends and fsyncs every record pending at that point in one
+go. Lap traces are serialised and checksummed there too, so a best lap
+costs the game thread no more than a lap. Each record is::
+
+    type     uint8
+    length   uint32    length of the payload
+    crc      uint32    crc32 of the payload
+    payload
+
+The journal is replayed when the app starts and reset once everything in it
+has reached the regular files.
+"""
+import os
+import struct
+import threading
+import zlib
+
+from LapTrace import LapTrace
+
+RECORD_LAP = 1
+RECORD_BEST_LAP = 2
+RECORD_PERSONAL_BEST = 3
+RECORD_SESSION_END = 4
+
+_recordHeader = struct.Struct("<BII")
+_lapPayload = struct.Struct("<i")
+_recordPayload = struct.Struct("<iH")
+
+
+class JournalRecord(object):
+    """
+    A record read back from the journal. Depending on the type, ``driver``,
+    ``time`` and ``trace`` may be None.
+    """
+
+    __slots__ = ("type", "driver", "time", "trace")
+
+    def __init__(self, type, driver=None, time=None, trace=None):
+        self.type = type
+        self.driver = driver
+        self.time = time
+        self.trace = trace
+
+
+class Journal(object):
+    """
+    An append-only journal file, written through a ``BackgroundWriter``.
+    """
+
+    def __init__(self, fileName, writer):
+        self.fileName = fileName
+        self.writer = writer
+        self.lock = threading.Lock()
+        self.pending = []
+        self.syncQueued = False
+
+
+    def recordLap(self, driver, lapTime):
+        """
+        Record a completed lap.
+        """
+        self._append(RECORD_LAP, _lapPayload.pack(lapTime) + driver.encode("utf-8"))
+
+
+    def recordBestLap(self, holder, lapTime, trace):
+        """
+        Record a new best lap with its trace.
+        """
+        self._append(RECORD_BEST_LAP, self._packRecord(holder, lapTime), trace)
+
+
+    def recordPersonalBest(self, driver, lapTime, trace):
+        """
+        Record a new personal best with its trace.
+        """
+        self._append(RECORD_PERSONAL_BEST, self._packRecord(driver, lapTime), trace)
+
+
+    def recordSessionEnd(self):
+        """
+        Record that the laps recorded so far have been written to the session
+        log.
+        """
+        self._append(RECORD_SESSION_END, b"")
+
+
+    def _packRecord(self, driver, lapTime):
+        driver = driver.encode("utf-8")
+        return _recordPayload.pack(lapTime, len(driver)) + driver
+
+
+    def _append(self, type, payload, trace=None):
+        """
+        Queue a record, whose payload is ``payload`` followed by ``trace``
+        once serialised. The trace must not change afterwards.
+        """
+        with self.lock:
+            self.pending.append((type, payload, trace))
+            if self.syncQueued:
+                return
+            self.syncQueued = True
+        if not self.writer.submit(self.sync):
+            # Queued again with the next record
+            with self.lock:
+                self.syncQueued = False
+
+
+    def sync(self):
+        """
+        Append every pending record to the journal file and fsync it. This
+        runs on the writer thread.
+        """
+        with self.lock:
+            pending = self.pending
+            self.pending = []
+            self.syncQueued = False
+        if not pending:
+            return
+
+        records = []
+        for type, payload, trace in pending:
+            if trace is not None:
+                payload += trace.toBytes()
+            records.append(_recordHeader.pack(type, len(payload),
+                    zlib.crc32(payload) & 0xffffffff))
+            records.append(payload)
+        with open(self.fileName, "ab") as fd:
+            fd.write(b"".join(records))
+            fd.flush()
+            os.fsync(fd.fileno())
+
+
+    def reset(self):
+        """
+        Empty the journal, once what it holds has been written elsewhere.
+        This must run on the writer thread, after the jobs writing it.
+        """
+        if os.path.exists(self.fileName):
+            os.remove(self.fileName)
+
+
+    def replay(self):
+        """
+        Return the list of ``JournalRecord`` in the journal file. Reading
+        stops at the first truncated or corrupt record, which is where a crash
+        interrupted a write.
+        """
+        try:
+            with open(self.fileName, "rb") as fd:
+                data = fd.read()
+        except IOError:
+            return []
+
+        records = []
+        offset = 0
+        while offset + _recordHeader.size <= len(data):
+            type, length, crc = _recordHeader.unpack_from(data, offset)
+            start = offset + _recordHeader.size
+            payload = data[start:start + length]
+            if len(payload) != length or zlib.crc32(payload) & 0xffffffff != crc:
+                break
+            offset = start + length
+
+            try:
+                records.append(self._unpackRecord(type, payload))
+            except (ValueError, struct.error, UnicodeDecodeError):
+                break
+
+        return records
+
+
+    def _unpackRecord(self, type, payload):
+        if type == RECORD_LAP:
+            lapTime, = _lapPayload.unpack_from(payload)
+            driver = payload[_lapPayload.size:].decode("utf-8")
+            return JournalRecord(type, driver, lapTime)
+        elif type in (RECORD_BEST_LAP, RECORD_PERSONAL_BEST):
+            lapTime, driverLength = _recordPayload.unpack_from(payload)
+            start = _recordPayload.size
+            driver = payload[start:start + driverLength].decode("utf-8")
+            trace = LapTrace.fromBytes(payload[start + driverLength:])
+            return JournalRecord(type, driver, lapTime, trace)
+        elif type == RECORD_SESSION_END:
+            return JournalRecord(type)
+        raise ValueError("Unknown journal record type: %d" % type)
@@ -0,0 +1,293 @@
+"""
+A compact storage type for lap traces, the (position, time) samples recorded
+while driving a lap, and the binary file format used to store them.
+
+A trace file is little-endian and made of a header followed by two columns::
+
+    magic    4 bytes   b"PLTR"
+    version  uint16    1
+    flags    uint16    0, or TRACE_COMPRESSED
+    count    uint32    number of samples
+    count x float32    positions
+    count x int32      times in milliseconds
+
+When the TRACE_COMPRESSED flag is set the columns are replaced by a zlib
+stream of zigzag varints: the differences between consecutive position bit
+patterns, then the differences between consecutive times. Positions only
+grow within a lap, and so do the bit patterns of positive floats, so most
+differences fit in one or two bytes before zlib even starts.
+"""
+import ast
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+
+from AtomicFile import atomicWrite
+
+TRACE_MAGIC = b"PLTR"
+TRACE_VERSION = 1
+TRACE_COMPRESSED = 0x0001
+
+_traceHeader = struct.Struct("<4sHHI")
+
+
+class LapTrace(object):
+    """
+    A lap trace stored as two columns: the normalised spline positions as
+    doubles and the lap times in milliseconds as integers. This costs 12
+    bytes per sample instead of a tuple and two boxed numbers.
+
+    Indexing returns ``(position, time)`` tuples, so a trace can be used
+    wherever a list of samples used to be. Slicing returns a new trace.
+    """
+
+    __slots__ = ("positions", "times")
+
+    def __init__(self, samples=()):
+        self.positions = array('d')
+        self.times = array('i')
+        for position, time in samples:
+            self.append(position, time)
+
+
+    def append(self, position, time):
+        """
+        Add a sample at the end of the trace.
+        """
+        self.positions.append(position)
+        self.times.append(int(time))
+
+
+    def bisect(self, position, lo=0, hi=None):
+        """
+        Return the index of the first sample whose position is not below
+        ``position``.
+        """
+        if hi is None:
+            hi = len(self.positions)
+        return bisect_left(self.positions, position, lo, hi)
+
+
+    def lastPosition(self):
+        """
+        Return the position of the last sample, or -1 if the trace is empty.
+        """
+        if not self.positions:
+            return -1
+        return self.positions[-1]
+
+
+    def copy(self):
+        trace = LapTrace()
+        trace.positions = array('d', self.positions)
+        trace.times = array('i', self.times)
+        return trace
+
+
+    def dumps(self):
+        """
+        Serialise the trace to the text format used by the best lap files,
+        a list of (position, time) tuples.
+        """
+        return str(list(self))
+
+
+    @classmethod
+    def loads(cls, text):
+        """
+        Parse the text format produced by ``dumps``.
+        """
+        return cls(ast.literal_eval(text))
+
+
+    def toBytes(self, compress=False):
+        """
+        Serialise the trace to the binary trace format, compressed if
+        ``compress`` is true.
+        """
+        positions = array('f', self.positions)
+        if compress:
+            bits = array('I')
+            bits.frombytes(positions.tobytes())
+            stream = bytearray()
+            _encodeDeltas(bits, stream)
+            _encodeDeltas(self.times, stream)
+            return b"".join((
+                _traceHeader.pack(TRACE_MAGIC, TRACE_VERSION, TRACE_COMPRESSED,
+                    len(self.times)),
+                zlib.compress(bytes(stream)),
+            ))
+
+        times = array('i', self.times)
+        if sys.byteorder != "little":
+            positions.byteswap()
+            times.byteswap()
+        return b"".join((
+            _traceHeader.pack(TRACE_MAGIC, TRACE_VERSION, 0, len(times)),
+            positions.tobytes(),
+            times.tobytes(),
+        ))
+
+
+    @classmethod
+    def fromBytes(cls, data):
+        """
+        Parse the binary trace format produced by ``toBytes``.
+        """
+        data = memoryview(data)
+        if len(data) < _traceHeader.size:
+            raise ValueError("Truncated lap trace header")
+        magic, version, flags, count = _traceHeader.unpack_from(data)
+        if magic != TRACE_MAGIC:
+            raise ValueError("Not a lap trace")
+        if version != TRACE_VERSION:
+            raise ValueError("Unsupported lap trace version: %d" % version)
+
+        start = _traceHeader.size
+        if flags & TRACE_COMPRESSED:
+            return cls._fromCompressed(data[start:], count)
+
+        middle = start + 4 * count
+        end = middle + 4 * count
+        if len(data) < end:
+            raise ValueError("Truncated lap trace data")
+
+        positions = array('f')
+        positions.frombytes(data[start:middle])
+        times = array('i')
+        times.frombytes(data[middle:end])
+        if sys.byteorder != "little":
+            positions.byteswap()
+            times.byteswap()
+
+        trace = cls()
+        trace.positions = array('d', positions)
+        trace.times = times
+        return trace
+
+
+    @classmethod
+    def _fromCompressed(cls, data, count):
+        """
+        Decode the compressed columns of a trace with ``count`` samples.
+        """
+        try:
+            stream = zlib.decompress(data)
+        except zlib.error as e:
+            raise ValueError("Corrupt lap trace data: %s" % e)
+
+        bits = array('I')
+        offset = _decodeDeltas(stream, 0, count, bits)
+        times = array('i')
+        _decodeDeltas(stream, offset, count, times)
+
+        positions = array('f')
+        positions.frombytes(bits.tobytes())
+
+        trace = cls()
+        trace.positions = array('d', positions)
+        trace.times = times
+        return trace
+
+
+    def __len__(self):
+        return len(self.positions)
+
+
+    def __iter__(self):
+        return zip(self.positions, self.times)
+
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            trace = LapTrace()
+            trace.positions = self.positions[index]
+            trace.times = self.times[index]
+            return trace
+        return (self.positions[index], self.times[index])
+
+
+    def __eq__(self, other):
+        if isinstance(other, LapTrace):
+            return self.positions == other.positions and self.times == other.times
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+
+    __hash__ = None
+
+
+    def __repr__(self):
+        return "LapTrace(%s)" % (list(self),)
+
+
+def _encodeDeltas(values, stream):
+    """
+    Append the differences between consecutive ``values`` to ``stream`` as
+    zigzag varints.
+    """
+    append = stream.append
+    last = 0
+    for value in values:
+        delta = value - last
+        last = value
+        # Zigzag: small negative and positive numbers both encode short.
+        delta = delta << 1 if delta >= 0 else (-delta << 1) - 1
+        while delta > 0x7f:
+            append((delta & 0x7f) | 0x80)
+            delta >>= 7
+        append(delta)
+
+
+def _decodeDeltas(stream, offset, count, values):
+    """
+    Decode ``count`` values encoded by ``_encodeDeltas`` from ``stream``,
+    starting at ``offset``, onto the ``values`` array. Return the offset
+    following the last value.
+    """
+    append = values.append
+    last = 0
+    try:
+        for index in range(count):
+            byte = stream[offset]
+            offset += 1
+            delta = byte & 0x7f
+            shift = 7
+            while byte & 0x80:
+                byte = stream[offset]
+                offset += 1
+                delta |= (byte & 0x7f) << shift
+                shift += 7
+            last += (delta >> 1) if not delta & 1 else -((delta + 1) >> 1)
+            append(last)
+    except IndexError:
+        raise ValueError("Truncated lap trace data")
+    except OverflowError:
+        raise ValueError("Corrupt lap trace data")
+    return offset
+
+
+def readTraceFile(fileName):
+    """
+    Read a trace from a binary trace file.
+    """
+    with open(fileName, "rb") as fd:
+        return LapTrace.fromBytes(fd.read())
+
+
+def writeTraceFile(fileName, trace, compress=False):
+    """
+    Write a trace to a binary trace file, compressed if ``compress`` is true.
+    """
+    atomicWrite(fileName, trace.toBytes(compress))
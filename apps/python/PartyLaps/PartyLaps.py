@@ -25,11 +25,26 @@ except ImportError:
 
 import sys
 import os
+import binascii
+import re
 import configparser
+import io
 import time
 import platform
+import threading
+from array import array
+from bisect import bisect_left
 
 from ACTable import ACTable
+from AtomicFile import atomicWrite
+from BackgroundWriter import BackgroundWriter
+from Journal import Journal, RECORD_LAP, RECORD_BEST_LAP, RECORD_PERSONAL_BEST, RECORD_SESSION_END
+from LapTrace import LapTrace, readTraceFile, writeTraceFile
+from Profiler import Profiler, appendReport
+from Scheduler import Scheduler
+from SessionLog import appendSession
+from TelemetryRecorder import TelemetryRecorder
+from TimeFormat import timeToString, deltaToString
 
 # Parameters from config file
 showHeader = 0
@@ -51,6 +66,10 @@ updateTime = 100
 logLaps = 1
 logBest = "always"
 lockBest = 0
+compressTraces = 0
+profile = 0
+profileWindow = 0
+recordTelemetry = 0
 
 driversList = []
 driversListText = ""
@@ -60,15 +79,45 @@ currentDriver = ""
 partyLapsApp = 0
 config = 0
 configApp = 0
+writer = 0
+scheduler = 0
+profiler = 0
+# The copy of the shared memory pages taken on this frame
+sim = 0
+profileApp = 0
+recorder = 0
+
+configFileName = "apps/python/PartyLaps/PartyLaps_config/config.ini"
+# Changes to the config are written once they have stopped for this long, in
+# seconds
+configWriteDelay = 2.0
+configDirty = False
+configQuietTime = 0
+
+profileFileName = "apps/python/PartyLaps/PartyLaps_session/profile.log"
+# Seconds between reports appended to the profile log
+profileDumpInterval = 60
+profileTime = 0
 
 # Display global settings
 spacing = 5
 topPadding = 30
 fontSizeConfig = 18
+# Seconds between checks of the drivers list input for changes
+driversPollTime = 1.0
+# Most lap rows that can be displayed, longer sessions are scrolled
 lapLabelCount = 50
+# Milliseconds to wait after a new lap shows before reading the last lap
+# time, which the game updates a little later
+newLapWait = 100
+
+# Resolution of the reference lap lookup grid, in fractions of a lap
+deltaGridSize = 10000
+
+# Resolution of the delta color gradient, in milliseconds
+deltaColorStep = 10
 
 # Global variable
-lastUpdateTime = 0
 useMyPerf = 1
 trackName = ""
 trackConf = ""
@@ -81,6 +130,34 @@ PIT_EXIT_STATE_THROTTLE     = 2
 PIT_EXIT_STATE_BRAKE        = 3
 PIT_EXIT_STATE_APPLY_OFFSET = 4
 
+# What has to be refreshed when a parameter changes, each level includes the
+# ones below it
+REFRESH_NONE     = 0
+REFRESH_STYLE    = 1
+REFRESH_DATA     = 2
+REFRESH_GEOMETRY = 3
+
+PARAMETER_REFRESH = {
+    "showHeader":        REFRESH_GEOMETRY,
+    "fontSize":          REFRESH_GEOMETRY,
+    "lapDisplayedCount": REFRESH_GEOMETRY,
+    "showCurrent":       REFRESH_GEOMETRY,
+    "showReference":     REFRESH_GEOMETRY,
+    "showTotal":         REFRESH_GEOMETRY,
+    "reference":         REFRESH_DATA,
+    "bestLapTime":       REFRESH_DATA,
+    "opacity":           REFRESH_STYLE,
+    "showBorder":        REFRESH_STYLE,
+    "deltaColor":        REFRESH_STYLE,
+    "redAt":             REFRESH_STYLE,
+    "greenAt":           REFRESH_STYLE,
+    "showDelta":         REFRESH_NONE,
+    "updateTime":        REFRESH_NONE,
+    "logLaps":           REFRESH_NONE,
+    "logBest":           REFRESH_NONE,
+    "lockBest":          REFRESH_NONE,
+}
+
 nurbTourist = False
 
 # import libraries
@@ -93,9 +170,12 @@ if not unitTesting:
         sys.path.insert(0, sysdir)
         os.environ['PATH'] = os.environ['PATH'] + ";."
 
-        from PartyLaps_lib.sim_info import info
+        from PartyLaps_lib.sim_info import info, AC_OFF, AC_PAUSE
     except Exception as e:
         ac.log("PartyLaps: Error importing libraries: %s" % e)
+else:
+    # Not connected to anything until configured or used
+    from PartyLaps_lib.sim_info import info, AC_OFF, AC_PAUSE
 
 
 def acMain(ac_version):
@@ -103,11 +183,12 @@ def acMain(ac_version):
     Initialise the application.
     """
     try:
-        global partyLapsApp, configApp, config
+        global partyLapsApp, configApp, config, writer, scheduler, sim, recorder
         global showHeader, fontSize, opacity, showBorder
         global lapDisplayedCount, showDelta, deltaColor, redAt, greenAt
         global reference, showCurrent, showReference, showTotal
-        global updateTime, logLaps, logBest, lockBest
+        global updateTime, logLaps, logBest, lockBest, compressTraces
+        global profile, profileWindow, recordTelemetry
         global driversListText, driversList, currentDriver
         global trackName, trackConf, carName, bestLapFile
         global nurbTourist
@@ -121,10 +202,9 @@ def acMain(ac_version):
                 os.mkdir(fullDirName)
 
         config = configparser.ConfigParser()
-        configFile = "apps/python/PartyLaps/PartyLaps_config/config.ini"
         mlConfigFile = "apps/python/MultiLaps/MultiLaps_config/config.ini"
 
-        config.read([mlConfigFile, configFile])
+        config.read([mlConfigFile, configFileName])
 
         try:
             config.add_section("SETTINGS")
@@ -148,6 +228,10 @@ def acMain(ac_version):
         logLaps           = config.getint("SETTINGS", "logLaps", fallback=1)
         logBest           = config.get("SETTINGS", "logBest", fallback="always")
         lockBest          = config.getint("SETTINGS", "lockBest", fallback=0)
+        compressTraces    = config.getint("SETTINGS", "compressTraces", fallback=0)
+        profile           = config.getint("SETTINGS", "profile", fallback=0)
+        profileWindow     = config.getint("SETTINGS", "profileWindow", fallback=0)
+        recordTelemetry   = config.getint("SETTINGS", "recordTelemetry", fallback=0)
         driversListText   = config.get("SETTINGS", "driversListText", fallback='')
         driversList       = explodeCSL(driversListText)
         currentDriver     = config.get("SETTINGS", "currentDriver", fallback=driversList[0])
@@ -166,14 +250,41 @@ def acMain(ac_version):
         if trackName == "ks_nordschleife" and trackConf == "touristenfahrten":
             nurbTourist = True
 
+        sim = info.snapshot()
+
+        writer = BackgroundWriter(ac.log)
+        writer.start()
+
+        if recordTelemetry:
+            if trackConf == "":
+                telemetryFile = "apps/python/PartyLaps/PartyLaps_session/{0} - {1} - {2}.telemetry".format(
+                    trackName, carName, time.strftime("%Y-%m-%d %H-%M-%S"))
+            else:
+                telemetryFile = "apps/python/PartyLaps/PartyLaps_session/{0} [{1}] - {2} - {3}.telemetry".format(
+                    trackName, trackConf, carName, time.strftime("%Y-%m-%d %H-%M-%S"))
+            recorder = TelemetryRecorder(telemetryFile, writer,
+                track=trackName, trackConf=trackConf, car=carName)
+
         deltaApp = PartyDelta()
 
-        partyLapsApp = PartyLaps(ac, "PartyLaps", "Laps", deltaApp)
+        partyLapsApp = PartyLaps(ac, "PartyLaps", "Laps", deltaApp, writer)
         partyLapsApp.refreshParameters()
+        partyLapsApp.prefetchPersonalBest(currentDriver)
+        partyLapsApp.prefetchPersonalBest(cycleDriver(driversList, currentDriver))
 
         configApp = PartyLaps_config("PartyLaps_config", "PartyLaps config", fontSizeConfig, 0)
         configApp.updateView()
 
+        scheduler = Scheduler()
+        scheduler.add("telemetry", updateTelemetry)
+        scheduler.add("delta", updateDelta, lambda: float(updateTime)/1000, 500)
+        scheduler.add("laps", updateLaps, 0, 1000)
+        scheduler.add("config", updateConfigView, 0.5, 300)
+        scheduler.add("housekeeping", updateHousekeeping, 0, 1000)
+
+        if profile:
+            startProfiler()
+
         ac.addRenderCallback(partyLapsApp.window, onRenderCallback)
 
         return "PartyLaps"
@@ -185,14 +296,35 @@ def acMain(ac_version):
 
 def acShutdown():
     try:
+        # The writer drops jobs rather than block the game while it runs.
+        # Nothing must be dropped now, so let it catch up first.
+        writer.flush()
+
         if info.graphics.status != 1:
-            partyLapsApp.writeSession()
-            partyLapsApp.writeBestLap()
+            partyLapsApp.persistSession()
+            partyLapsApp.persistBestLap()
+            partyLapsApp.resetJournal()
+
+        flushParameters()
+        if profiler:
+            writer.submit(appendReport, profileFileName, profiler.report())
+        if recorder:
+            recorder.queueFlush()
+            ac.log("PartyLaps: Recorded %d telemetry records, dropped %d"
+                    % (recorder.head, recorder.dropped))
+
+        # Make sure that everything queued has reached the disk.
+        writer.close()
 
     except Exception as e:
         ac.log("PartyLaps: Error in acShutdown: %s" % e)
 
-def writeParameters():
+def markParametersChanged():
+    """
+    Store the parameters in the config, to be written by
+    ``flushParameters`` once they stop changing.
+    """
+    global configDirty, configQuietTime
     try:
         config.set("SETTINGS", "showHeader", str(showHeader))
         config.set("SETTINGS", "fontSize", str(fontSize))
@@ -211,52 +343,156 @@ def writeParameters():
         config.set("SETTINGS", "logLaps",  str(logLaps))
         config.set("SETTINGS", "logBest",  str(logBest))
         config.set("SETTINGS", "lockBest",  str(lockBest))
+        config.set("SETTINGS", "compressTraces",  str(compressTraces))
+        config.set("SETTINGS", "profile",  str(profile))
+        config.set("SETTINGS", "profileWindow",  str(profileWindow))
+        config.set("SETTINGS", "recordTelemetry",  str(recordTelemetry))
         config.set("SETTINGS", "driversListText", driversListText)
         config.set("SETTINGS", "currentDriver", currentDriver)
 
-        configFile = open("apps/python/PartyLaps/PartyLaps_config/config.ini", 'w')
-        config.write(configFile)
-        configFile.close()
+        configDirty = True
+        configQuietTime = 0
 
     except Exception as e:
-        ac.log("PartyLaps: Error in writeParameters while writing the file: %s" % e)
+        ac.log("PartyLaps: Error in markParametersChanged: %s" % e)
 
-def refreshAndWriteParameters():
+def updateParameters(deltaT):
+    """
+    Write the config if it changed and has not changed again for
+    ``configWriteDelay`` seconds.
+    """
+    global configQuietTime
+    if not configDirty:
+        return
+    configQuietTime += deltaT
+    if configQuietTime >= configWriteDelay:
+        flushParameters()
+
+def flushParameters():
+    """
+    Queue the config to be written if it has changed. It is rendered here and
+    written atomically by the background writer.
+    """
+    global configDirty
     try:
-        partyLapsApp.refreshParameters()
-        partyLapsApp.updateData()
-        partyLapsApp.updateView()
-        configApp.updateView()
-        writeParameters()
+        if not configDirty:
+            return
+        configDirty = False
+        text = io.StringIO()
+        config.write(text)
+        writer.submit(atomicWrite, configFileName, text.getvalue())
 
     except Exception as e:
-        ac.log("PartyLaps: Error in refreshAndWriteParameters: %s" % e)
+        ac.log("PartyLaps: Error in flushParameters: %s" % e)
 
-def acUpdate(deltaT):
+def refreshAndWriteParameters(*names):
     """
-    This function is called for every frame rendered. Instruct every app to
-    update its view, if the time since the last update is great enough.
+    Apply and save a change of the parameters ``names``. Only what these
+    parameters affect is refreshed, see ``PARAMETER_REFRESH``.
     """
     try:
-        global lastUpdateTime
-        lastUpdateTime += deltaT
-
-        if lastUpdateTime < float(updateTime)/1000:
-            return
+        refresh = max([PARAMETER_REFRESH.get(name, REFRESH_GEOMETRY) for name in names]
+                or [REFRESH_GEOMETRY])
+        partyLapsApp.refreshParameters(refresh)
+        configApp.updateView(names or None)
+        markParametersChanged()
 
-        lastUpdateTime = 0
+    except Exception as e:
+        ac.log("PartyLaps: Error in refreshAndWriteParameters: %s" % e)
 
-        # block refresh during replay
-        #if info.graphics.status != 1:
-        partyLapsApp.updateData()
-        partyLapsApp.updateView()
-        configApp.updateView()
+def acUpdate(deltaT):
+    """
+    This function is called for every frame rendered. The scheduler runs the
+    update tiers which are due.
+    """
+    try:
+        scheduler.tick(deltaT)
 
     except Exception as e:
         import traceback
         ac.log("PartyLaps: Error in acUpdate: %s" % e)
         ac.log(traceback.format_exc())
 
+def simulationAdvancing():
+    """
+    Return whether the game has produced new telemetry since the last
+    snapshot, copied without the game writing it, and is neither paused nor
+    off. When it is not, there is nothing new to compute or display.
+    """
+    return (sim.advanced and sim.consistent
+            and sim.graphics.status != AC_PAUSE and sim.graphics.status != AC_OFF)
+
+def updateTelemetry(deltaT):
+    """
+    Sample the car state, on every frame, and record it when asked to.
+    """
+    global sim
+    sim = info.snapshot()
+    carState = None
+    if recorder and recorder.isNewPacket(sim):
+        carState = partyLapsApp.readCarState()
+        recorder.record(sim, *carState)
+    partyLapsApp.updateData(carState)
+
+def updateDelta(deltaT):
+    """
+    Display the current lap and the deltas, every ``updateTime``.
+    """
+    partyLapsApp.updateViewDelta()
+
+def updateLaps(deltaT):
+    """
+    Display the laps when a lap has been completed.
+    """
+    partyLapsApp.updateViewLapChange()
+
+def updateConfigView(deltaT):
+    """
+    Display the best lap time in the config widget and read its drivers list.
+    """
+    configApp.pollDriversInput(deltaT)
+    configApp.updateView(("bestLapTime",))
+
+def updateHousekeeping(deltaT):
+    """
+    Work which can wait for a frame with time to spare.
+    """
+    updateParameters(deltaT)
+    if profiler:
+        updateProfiler(deltaT)
+
+def startProfiler():
+    """
+    Instrument the hot functions and the scheduler tiers. Until this is
+    called they run uninstrumented.
+    """
+    global profiler, profileApp
+    profiler = Profiler()
+    module = sys.modules[__name__]
+    for name in ("acUpdate", "calculateDelta"):
+        profiler.instrument(module, name)
+    for name in ("updateDataFast", "updateViewFast", "writeSession"):
+        profiler.instrument(PartyLaps, name)
+    for task in scheduler.tasks:
+        task.function = profiler.wrap("tier " + task.name, task.function)
+
+    if profileWindow:
+        profileApp = PartyProfile(profiler)
+
+def updateProfiler(deltaT):
+    """
+    Refresh the profile window and periodically append a report to the
+    profile log.
+    """
+    global profileTime
+    if profileApp:
+        profileApp.update(deltaT)
+
+    profileTime += deltaT
+    if profileTime >= profileDumpInterval:
+        profileTime = 0
+        writer.submit(appendReport, profileFileName, profiler.report())
+
 def onRenderCallback(deltaT):
     """
     This is called when the app has been moved.
@@ -270,10 +506,12 @@ def onRenderCallback(deltaT):
 
 class PartyLaps:
 
-    def __init__(self, ac, name, headerName, deltaApp):
+    def __init__(self, ac, name, headerName, deltaApp, writer=None):
         self.ac = ac
         self.headerName = headerName
         self.deltaApp = deltaApp
+        # Without a started writer, writes happen synchronously.
+        self.writer = writer or BackgroundWriter()
         self.window = self.ac.newApp(name)
 
         self.lastLapDataRefreshed = -1
@@ -285,19 +523,23 @@ class PartyLaps:
         self.bestLapHolder = ""
         self.referenceTime = 0
         self.laps = []
+        # Index of the first lap displayed, or None to follow the last laps
+        self.lapOffset = None
+        # What each lap row displays, to only update the rows which change
+        self.lapRows = {}
         self.bestLapFile = bestLapFile
-        self.bestLapData = []
-        self.currentLapData = [(0.0,0.0)]
+        self.bestLapData = LapTrace()
+        self.currentLapData = LapTrace([(0.0,0.0)])
         self.personalBests = {}
+        self.bestLapGrid = DeltaGrid(writer=self.writer)
+        self.pbGrid = DeltaGrid(writer=self.writer)
         self.sfCrossed = 0
-        try:
-            self.session = info.graphics.session
-        except NameError:
-            # In a test
-            pass
+        # Without a snapshot we are in a test
+        self.session = sim.graphics.session if sim else 0
         self.lastSession = 0
         self.lapInvalidated = False
         self.justCrossedSf = False
+        self.newLapSeenAt = 0
         self.position = 0
         self.lastPosition = 0
         self.currentTime = 0
@@ -305,6 +547,18 @@ class PartyLaps:
         self.pitExitState = 0
         self.pitExitDeltaOffset = 0
         self.pitExitLap = 0
+        self.journal = None
+        # What is known to be on disk, to only write what has changed
+        self.writtenBestLap = None
+        self.writtenPersonalBests = {}
+        # Bumped whenever the files may have changed behind a write in
+        # progress, which then must not mark what it wrote as written
+        self.writtenGeneration = 0
+        # Personal best traces are loaded on first use
+        self.unloadedTraces = {}
+        # Drivers whose trace is queued to be loaded
+        self.prefetching = set()
+        self.traceLock = threading.Lock()
 
         self.readBestLap()
 
@@ -335,6 +589,7 @@ class PartyLaps:
         self.table.setFontSize(fontSize)
 
         self.table.draw()
+        self.lapRows = {}
 
         width, height = self.table.getDimensions()
         self.ac.setSize(self.window, width, height)
@@ -348,18 +603,7 @@ class PartyLaps:
 
         if showCurrent:
             self.table.setCellValue("Curr.", 0, self.currRowIndex)
-        if showReference:
-            if reference == "best":
-                refText = "Best"
-            elif reference == "median":
-                refText = "Med."
-            elif reference == "top25":
-                refText = "25%"
-            elif reference == "top50":
-                refText = "50%"
-            elif reference == "top75":
-                refText = "75%"
-            self.table.setCellValue(refText, 0, self.refRowIndex)
+        self.setReferenceCellValue()
         self.table.setCellValue("Pers.", 0, self.pbRowIndex)
         self.table.setCellValue("-.---", 2, self.pbRowIndex)
         if showTotal:
@@ -367,11 +611,36 @@ class PartyLaps:
 
         self.table.addOnClickedListener(0, 0, onClickDriver)
         self.table.addOnClickedListener(1, 0, onClickDriver)
+        # Listeners stay on the labels when the rows change, so each lap
+        # number gets one which decides what to do when it is clicked.
+        if lapDisplayedCount > 0:
+            self.table.addOnClickedListener(0, 1, onClickLapRows[1])
+            self.table.addOnClickedListener(0, lapDisplayedCount,
+                    onClickLapRows[lapDisplayedCount])
 
         self.setDriverCellValues()
         self.setPersonalBestCellValues()
 
 
+    def setReferenceCellValue(self):
+        """
+        Display the name of the reference in its row.
+        """
+        if not showReference:
+            return
+        if reference == "best":
+            refText = "Best"
+        elif reference == "median":
+            refText = "Med."
+        elif reference == "top25":
+            refText = "25%"
+        elif reference == "top50":
+            refText = "50%"
+        elif reference == "top75":
+            refText = "75%"
+        self.table.setCellValue(refText, 0, self.refRowIndex)
+
+
     def setDriverCellValues(self):
         """
         Set the values for the current driver information row.
@@ -387,13 +656,25 @@ class PartyLaps:
         self.table.setCellValue(timeToString(self.personalBest()), 1, self.pbRowIndex)
 
 
-    def refreshParameters(self):
-        # Force full refresh
-        self.draw()
-        self.updateDataFast()
-        self.updateDataRef()
-        self.updateViewFast()
-        self.updateViewNewLap()
+    def refreshParameters(self, refresh=REFRESH_GEOMETRY):
+        """
+        Refresh the window after a parameter change. ``refresh`` is what the
+        change affects: the table geometry, the data or only the style.
+        Changes are mostly made while the game is paused, so this does not
+        wait for the simulation to advance like the scheduled updates.
+        """
+        if refresh >= REFRESH_GEOMETRY:
+            self.draw()
+        if refresh >= REFRESH_DATA:
+            self.setReferenceCellValue()
+            self.updateDataFast()
+            self.updateDataRef()
+        if refresh >= REFRESH_STYLE:
+            # Repaint every lap row, their colors may have changed
+            self.lapRows = {}
+            self.onRenderCallback(0)
+            self.updateViewFast()
+            self.updateViewNewLap()
 
     def onRenderCallback(self, deltaT):
         # Update background and border in case the app has been moved
@@ -401,39 +682,63 @@ class PartyLaps:
         self.ac.drawBorder(self.window, showBorder)
         self.deltaApp.onRenderCallback()
 
-    def updateData(self):
-        self.updateDataFast()
+    def updateData(self, carState=None):
+        """
+        Update the laps and the deltas from ``carState``, the car state of
+        this frame if it has already been read.
+        """
+        if not simulationAdvancing():
+            return
+
+        self.updateDataFast(carState)
 
         # Refresh on a new lap if we are not watching a replay
-        if (self.lastLapDataRefreshed != self.lapDone) and (info.graphics.status != 1):
-            # To be sure that the last lap has been updated, we wait for the 2nd refresh or 200ms
-            if self.justCrossedSf or (self.currentTime > 200):
+        if (self.lastLapDataRefreshed != self.lapDone) and (sim.graphics.status != 1):
+            # To be sure that the last lap has been updated, we wait for
+            # newLapWait or until 200ms into the new lap
+            if not self.justCrossedSf:
+                self.justCrossedSf = True
+                self.newLapSeenAt = self.currentTime
+            if self.currentTime > 200 or self.currentTime - self.newLapSeenAt >= newLapWait:
                 self.updateDataNewLap()
                 self.updateDataRef()
                 self.justCrossedSf = False
-            else:
-                self.justCrossedSf = True
-
-    def updateDataFast(self):
-        self.currentTime = self.ac.getCarState(0, acsys.CS.LapTime)
 
-        if info.graphics.status == 1:
+    def readCarState(self):
+        """
+        Return the lap time, lap count, best lap, position and whether the
+        car is in the pit lane, read once per frame for both the laps and
+        the telemetry recorder.
+        """
+        return (self.ac.getCarState(0, acsys.CS.LapTime),
+                self.ac.getCarState(0, acsys.CS.LapCount),
+                self.ac.getCarState(0, acsys.CS.BestLap),
+                self.ac.getCarState(0, acsys.CS.NormalizedSplinePosition),
+                self.ac.isCarInPitline(0))
+
+    def updateDataFast(self, carState=None):
+        if carState is None:
+            carState = self.readCarState()
+        lapTime, lapCount, bestLap, position, inPitLine = carState
+        self.currentTime = lapTime
+
+        if sim.graphics.status == 1:
             self.projection = 0
             self.performance = 0
             self.pbPerformance = 0
             return
 
-        self.lapDone = self.ac.getCarState(0, acsys.CS.LapCount)
-        self.currentPosition = self.ac.getCarState(0, acsys.CS.NormalizedSplinePosition)
+        self.lapDone = lapCount
+        self.currentPosition = position
 
-        if self.ac.isCarInPitline(0):
+        if inPitLine:
             self.pitExitState = PIT_EXIT_STATE_IN_PIT_LANE
         elif self.pitExitState == PIT_EXIT_STATE_IN_PIT_LANE:
             self.pitExitLap = self.lapDone
             self.pitExitState = PIT_EXIT_STATE_THROTTLE
-        elif self.pitExitState == PIT_EXIT_STATE_THROTTLE and info.physics.brake > 0.1:
+        elif self.pitExitState == PIT_EXIT_STATE_THROTTLE and sim.physics.brake > 0.1:
             self.pitExitState = PIT_EXIT_STATE_BRAKE
-        elif self.pitExitState == PIT_EXIT_STATE_BRAKE and info.physics.gas > 0.9:
+        elif self.pitExitState == PIT_EXIT_STATE_BRAKE and sim.physics.gas > 0.9:
             self.pitExitState = PIT_EXIT_STATE_APPLY_OFFSET
             self.pitExitDeltaOffset = self.performance
         elif self.pitExitState == PIT_EXIT_STATE_APPLY_OFFSET and self.lapDone > self.pitExitLap:
@@ -458,27 +763,28 @@ class PartyLaps:
 
         self.position = self.currentPosition
         self.lastPosition = self.currentPosition
-        self.bestLapAc = self.ac.getCarState(0, acsys.CS.BestLap)
+        self.bestLapAc = bestLap
 
-        self.lapInvalidated = info.physics.numberOfTyresOut == 4 or self.lapInvalidated
+        self.lapInvalidated = sim.physics.numberOfTyresOut == 4 or self.lapInvalidated
 
-        self.session = info.graphics.session
+        self.session = sim.graphics.session
 
         # This will happend after a reset AND at the beginning of the first lap
         if self.session != self.lastSession or (self.currentTime < 500 and self.lapDone == 0):
-            self.currentLapData = [(0.0,0.0)]
+            self.currentLapData = LapTrace([(0.0,0.0)])
 
-            self.writeSession()
+            self.persistSession()
             self.bestLapTimeSession = 0
             self.total = 0
             self.referenceTime = self.bestLapTime
             self.laps = []
+            self.lapOffset = None
 
             self.lastSession = self.session
 
             if logBest == "never":
                 self.bestLapTime == 0
-                self.bestLapData == []
+                self.bestLapData == LapTrace()
 
             # Check if the reset has put us behind the s/f line
             if self.position > 0.5:
@@ -493,15 +799,17 @@ class PartyLaps:
 
         if useMyPerf:
             # If the position has increased and we are not in replay, add the new position
-            if self.position > self.currentLapData[len(self.currentLapData)-1][0]:
-                self.currentLapData.append((self.position, self.currentTime))
+            if self.position > self.currentLapData.lastPosition():
+                self.currentLapData.append(self.position, self.currentTime)
 
-            self.myPerformance = calculateDelta(self.position, self.currentTime, self.bestLapData)
+            self.myPerformance = calculateDelta(self.position, self.currentTime, self.bestLapData,
+                    self.bestLapGrid)
 
             self.projection = self.bestLapTime + self.myPerformance
             self.performance = self.myPerformance + (self.bestLapTime - self.referenceTime)*self.position
 
-            self.pbPerformance = calculateDelta(self.position, self.currentTime, self.personalBestData())
+            self.pbPerformance = calculateDelta(self.position, self.currentTime,
+                    self.personalBestData(), self.pbGrid)
 
         else:
             # This path is never followed
@@ -525,7 +833,7 @@ class PartyLaps:
 
         # self.ac.getCarState(0, acsys.CS.LastLap) doesn't work yet
         #lapTime = self.ac.getCarState(0, acsys.CS.LastLap)
-        lapTime = info.graphics.iLastTime
+        lapTime = sim.graphics.iLastTime
         if lapTime <= 0:
             lastSplits = self.ac.getLastSplits(0)
             lapTime = 0
@@ -535,12 +843,16 @@ class PartyLaps:
         if self.bestLapTimeSession == 0 or lapTime < self.bestLapTimeSession:
             self.bestLapTimeSession = lapTime
 
+        # Close the trace of the lap, it may become a reference below
+        self.currentLapData.append(1.0, lapTime)
+
         if not lockBest and (self.bestLapTime == 0 or lapTime < self.bestLapTime) and not self.lapInvalidated:
             # New record!
             self.bestLapTime = lapTime
             self.bestLapHolder = currentDriver
-            self.currentLapData.append((1.0, lapTime))
             self.bestLapData = self.currentLapData
+            if self.journal:
+                self.journal.recordBestLap(currentDriver, lapTime, self.currentLapData)
             #self.ac.log("PartyLaps: New best lap time: {0} Data: {1}".format(timeToString(self.bestLapTime), str(self.bestLapData)))
 
         # Look for a personal best
@@ -551,16 +863,19 @@ class PartyLaps:
                 "time": lapTime,
                 "data": self.currentLapData,
             }
-            pbInfo['data'].append((1.0, lapTime))
             self.personalBests[currentDriver] = pbInfo
+            if self.journal:
+                self.journal.recordPersonalBest(currentDriver, lapTime, self.currentLapData)
             self.setPersonalBestCellValues()
 
         # Reset for the new lap
-        self.currentLapData = [(0.0,0.0)]
+        self.currentLapData = LapTrace([(0.0,0.0)])
         self.lapInvalidated = False
 
         self.total += lapTime
         self.laps.append(lapTime)
+        if self.journal:
+            self.journal.recordLap(currentDriver, lapTime)
 
     def updateDataRef(self):
         if reference == "best":
@@ -604,13 +919,30 @@ class PartyLaps:
             return lapsSorted[0]
 
     def updateView(self):
-        if self.justCrossedSf:
+        self.updateViewDelta()
+        self.updateViewLapChange()
+
+
+    def updateViewDelta(self):
+        """
+        Refresh the current lap, unless a lap is being completed or the game
+        is not running.
+        """
+        if self.justCrossedSf or not simulationAdvancing():
             return
 
         self.updateViewFast()
 
-        # Refresh laps and total only on lap change and not replay
-        if self.lastLapViewRefreshed != self.lastLapDataRefreshed and info.graphics.status != 1:
+
+    def updateViewLapChange(self):
+        """
+        Refresh the laps and total on lap change, unless a lap is being
+        completed, the game is not running or we are watching a replay.
+        """
+        if self.justCrossedSf or not simulationAdvancing():
+            return
+
+        if self.lastLapViewRefreshed != self.lastLapDataRefreshed and sim.graphics.status != 1:
             self.updateViewNewLap()
 
 
@@ -618,31 +950,84 @@ class PartyLaps:
         """
         Refresh the laps and the total.
         """
+        self.updateViewLaps()
+
+        # Refresh Total
+        self.table.setCellValue(timeToString(self.total), 1, self.totRowIndex)
+
+        # Refresh reference
+        self.table.setCellValue(timeToString(self.referenceTime), 1, self.refRowIndex)
+
+        # Update the new lap holder view
+        self.table.setCellValue(self.bestLapHolder, 2, self.refRowIndex)
+
+        self.lastLapViewRefreshed = self.lastLapDataRefreshed
+
+
+    def firstLapIndex(self):
+        """
+        Return the index of the lap displayed in the first lap row.
+        """
+        lastOffset = max(0, len(self.laps) - lapDisplayedCount)
+        if self.lapOffset is None:
+            return lastOffset
+        return min(self.lapOffset, lastOffset)
+
+
+    def scrollLaps(self, step):
+        """
+        Scroll the lap rows by ``step`` laps, negative to go back. Scrolling
+        down to the last lap follows new laps again.
+        """
+        offset = self.firstLapIndex() + step
+        if offset >= len(self.laps) - lapDisplayedCount:
+            self.lapOffset = None
+        else:
+            self.lapOffset = max(0, offset)
+        self.updateViewLaps()
+
+
+    def updateViewLaps(self):
+        """
+        Refresh the lap rows. The rows are a window over the laps of the
+        session, and only the rows whose lap, highlight or delta changed are
+        updated.
+        """
+        firstLapIndex = self.firstLapIndex()
         for index in range(lapDisplayedCount):
             rowIndex = index + 1
-            lapIndex = index
-            if len(self.laps) > lapDisplayedCount:
-                lapIndex += len(self.laps)-lapDisplayedCount
+            lapIndex = firstLapIndex + index
 
-            # Refresh lap number
             if (self.pitExitLap > 0) and (self.pitExitLap <= lapIndex < self.lapDone):
-                self.table.setCellValue("{0}. ({1})".format(lapIndex+1, lapIndex-self.pitExitLap+1), 0, rowIndex)
+                lapNumber = "{0}. ({1})".format(lapIndex+1, lapIndex-self.pitExitLap+1)
             else:
-                self.table.setCellValue("%d." % (lapIndex+1), 0, rowIndex)
+                lapNumber = "%d." % (lapIndex+1)
+
+            if lapIndex < len(self.laps):
+                lapTime = self.laps[lapIndex]
+                row = (lapNumber, lapTime, lapTime == self.bestLapAc, self.referenceTime)
+            else:
+                row = (lapNumber,)
+
+            if self.lapRows.get(rowIndex) == row:
+                continue
+            self.lapRows[rowIndex] = row
+
+            # Refresh lap number
+            self.table.setCellValue(lapNumber, 0, rowIndex)
 
             # Refresh lap times and deltas
             if lapIndex < len(self.laps):
-                self.table.setCellValue(timeToString(self.laps[lapIndex]), 1, rowIndex)
+                self.table.setCellValue(timeToString(lapTime), 1, rowIndex)
 
                 # Best lap in green
-                if self.laps[lapIndex] == self.bestLapAc:
+                if lapTime == self.bestLapAc:
                     self.table.setFontColor(0, 1, 0, 1, 1, rowIndex)
                 else:
                     self.table.setFontColor(1, 1, 1, 1, 1, rowIndex)
 
                 # Refresh delta label
-                setDelta(self.table.getCellLabel(2, rowIndex),
-                        self.laps[lapIndex] - self.referenceTime)
+                setDelta(self.table, 2, rowIndex, lapTime - self.referenceTime)
 
             else:
                 self.table.setCellValue(timeToString(0), 1, rowIndex)
@@ -650,33 +1035,22 @@ class PartyLaps:
                 self.table.setCellValue("-.---", 2, rowIndex)
                 self.table.setFontColor(1, 1, 1, 1, 2, rowIndex)
 
-        # Refresh Total
-        self.table.setCellValue(timeToString(self.total), 1, self.totRowIndex)
-
-        # Refresh reference
-        self.table.setCellValue(timeToString(self.referenceTime), 1, self.refRowIndex)
-
-        # Update the new lap holder view
-        self.table.setCellValue(self.bestLapHolder, 2, self.refRowIndex)
-
-        self.lastLapViewRefreshed = self.lastLapDataRefreshed
-
 
     def updateViewFast(self):
         """
         Refresh current lap projection and performance.
         """
-        if self.sfCrossed and len(self.bestLapData) > 0 and info.graphics.status != 1 and self.position > 0.00001:
+        if self.sfCrossed and len(self.bestLapData) > 0 and sim.graphics.status != 1 and self.position > 0.00001:
             self.table.setCellValue(timeToString(self.projection), 1, self.currRowIndex)
             if self.pitExitState == PIT_EXIT_STATE_APPLY_OFFSET:
-                setDelta(self.table.getCellLabel(2, self.currRowIndex),
+                setDelta(self.table, 2, self.currRowIndex,
                         self.performance-self.pitExitDeltaOffset, self.deltaApp)
-                setDelta(self.table.getCellLabel(2, self.pbRowIndex),
+                setDelta(self.table, 2, self.pbRowIndex,
                         self.pbPerformance-self.pitExitDeltaOffset, self.deltaApp, True)
             else:
-                setDelta(self.table.getCellLabel(2, self.currRowIndex),
+                setDelta(self.table, 2, self.currRowIndex,
                         self.performance, self.deltaApp)
-                setDelta(self.table.getCellLabel(2, self.pbRowIndex),
+                setDelta(self.table, 2, self.pbRowIndex,
                         self.pbPerformance, self.deltaApp, True)
         else:
             self.table.setCellValue(timeToString(self.currentTime), 1, self.currRowIndex)
@@ -689,41 +1063,45 @@ class PartyLaps:
             self.table.setFontColor(1, 1, 1, 1, 1, self.currRowIndex)
 
 
-    def writeSession(self):
-        try:
-            if logLaps and len(self.laps) > 0:
-                lapsLog = configparser.ConfigParser()
-                if trackConf == "":
-                    fileName = "apps/python/PartyLaps/PartyLaps_session/{0} - {1} - {2}.ini".format(
-                        trackName, carName, time.strftime("%Y-%m-%d"))
-                else:
-                    fileName = "apps/python/PartyLaps/PartyLaps_session/{0} [{1}] - {2} - {3}.ini".format(
-                        trackName, trackConf, carName, time.strftime("%Y-%m-%d"))
-
-                if os.path.exists(fileName):
-                    lapsLog.read(fileName)
-
-                sessionNumer = 1
-                sectionName = "Session {0}".format(sessionNumer)
-
-                while lapsLog.has_section(sectionName):
-                    sessionNumer += 1
-                    sectionName = "Session {0}".format(sessionNumer)
+    def persistSession(self):
+        """
+        Queue the current session to be written to the session log.
+        """
+        if logLaps and len(self.laps) > 0:
+            self.writer.submit(self.writeSession, self.sessionSnapshot())
+        if self.journal and len(self.laps) > 0:
+            self.journal.recordSessionEnd()
 
-                lapsLog.add_section(sectionName)
 
-                for index in range(len(self.laps)):
-                    lapsLog.set(sectionName, "Lap {0}".format(index+1), timeToString(self.laps[index]))
+    def sessionSnapshot(self):
+        """
+        Return a copy of everything ``writeSession`` needs, which is safe to
+        use from the writer thread.
+        """
+        if trackConf == "":
+            fileName = "apps/python/PartyLaps/PartyLaps_session/{0} - {1} - {2}.log".format(
+                trackName, carName, time.strftime("%Y-%m-%d"))
+        else:
+            fileName = "apps/python/PartyLaps/PartyLaps_session/{0} [{1}] - {2} - {3}.log".format(
+                trackName, trackConf, carName, time.strftime("%Y-%m-%d"))
 
-                if reference != "best":
-                    lapsLog.set(sectionName, reference.title(), timeToString(self.referenceTime))
+        return {
+            "fileName": fileName,
+            "laps": tuple(self.laps),
+            "reference": reference,
+            "referenceTime": self.referenceTime,
+            "best": self.bestLapTimeSession,
+            "total": self.total,
+        }
 
-                lapsLog.set(sectionName, "Best", timeToString(self.bestLapTimeSession))
-                lapsLog.set(sectionName, "Total", timeToString(self.total))
 
-                lapsLogFile = open(fileName, "w")
-                lapsLog.write(lapsLogFile)
-                lapsLogFile.close()
+    def writeSession(self, session):
+        """
+        Append a session snapshot to the day's session log.
+        """
+        try:
+            if len(session["laps"]) > 0:
+                appendSession(session["fileName"], session)
 
         except Exception as e:
             self.ac.log("PartyLaps class: Error in writeSession: %s" % e)
@@ -739,13 +1117,77 @@ class PartyLaps:
 
                 self.bestLapTime = configBestLap.getint("TIME", "best", fallback=0)
                 self.bestLapHolder = configBestLap.get("TIME", "holder", fallback='')
-                self.bestLapData = eval(configBestLap.get("DATA", "data", fallback="[]"))
+                self.bestLapData = self.readTrace(
+                        configBestLap.get("DATA", "trace", fallback=None),
+                        configBestLap.get("DATA", "data", fallback="[]"))
                 self.referenceTime = self.bestLapTime
+                if configBestLap.has_option("DATA", "trace"):
+                    self.writtenBestLap = (self.bestLapTime, self.bestLapHolder, self.bestLapData)
 
         except Exception as e:
             self.ac.log("PartyLaps class: Error in writeBestLap: %s" % e)
 
         self.readPersonalBests()
+        self.openJournal()
+
+
+    def openJournal(self):
+        """
+        Open the journal of laps and records. If the game crashed last time,
+        what the journal holds is merged into the best laps and written to the
+        regular files before the journal is started afresh.
+        """
+        self.journal = None
+        if logBest != "always" or not self.bestLapFile:
+            return
+
+        self.journal = Journal(os.path.splitext(self.bestLapFile)[0] + ".journal", self.writer)
+        records = self.journal.replay()
+        if not records:
+            return
+
+        laps = []
+        for record in records:
+            if record.type == RECORD_LAP:
+                laps.append(record.time)
+            elif record.type == RECORD_SESSION_END:
+                # These laps made it to the session log
+                laps = []
+            elif record.type == RECORD_BEST_LAP:
+                if self.bestLapTime == 0 or record.time < self.bestLapTime:
+                    self.bestLapTime = record.time
+                    self.bestLapHolder = record.driver
+                    self.bestLapData = record.trace
+                    self.referenceTime = self.bestLapTime
+            elif record.type == RECORD_PERSONAL_BEST:
+                pb = self.personalBests.get(record.driver)
+                if pb is None or record.time < pb["time"]:
+                    self.personalBests[record.driver] = {
+                        "time": record.time,
+                        "data": record.trace,
+                    }
+
+        if logLaps and laps:
+            session = self.sessionSnapshot()
+            session.update({
+                "laps": tuple(laps),
+                "reference": "best",
+                "referenceTime": self.bestLapTime,
+                "best": min(laps),
+                "total": sum(laps),
+            })
+            self.writer.submit(self.writeSession, session)
+
+        self.persistBestLap()
+        self.resetJournal()
+
+
+    def resetJournal(self):
+        """
+        Queue the journal to be emptied, after the writes queued before.
+        """
+        if self.journal:
+            self.writer.submit(self.journal.reset)
 
 
     def readPersonalBests(self):
@@ -769,31 +1211,104 @@ class PartyLaps:
         config = configparser.ConfigParser()
         config.read(self.bestLapFile)
 
+        unloadedTraces = {}
         sections = config.sections()
         for section in sections:
             if not section.startswith("PB_"):
                 continue
             driver = config.get(section, "driver")
             time = config.getint(section, "time")
-            data = eval(config.get(section, "data"))
-            personalBests[driver] = {"time":time, "data":data}
+            # Only the times are needed to start with, the traces are loaded
+            # by loadPersonalBestData when they are first needed.
+            personalBests[driver] = {"time":time, "data":None}
+            unloadedTraces[driver] = (config.get(section, "trace", fallback=None),
+                    config.get(section, "data", fallback="[]"))
 
-        self.personalBests = personalBests
+        with self.traceLock:
+            self.personalBests = personalBests
+            self.unloadedTraces = unloadedTraces
+            self.writtenPersonalBests = {}
+            self.writtenGeneration += 1
+
+
+    def loadPersonalBestData(self, driver):
+        """
+        Load the trace of a driver's personal best if it has not been loaded
+        yet, and return it. This is safe to call from the writer thread to
+        prefetch a trace.
+        """
+        with self.traceLock:
+            self.prefetching.discard(driver)
+            info = self.personalBests.get(driver)
+            if info is None:
+                return LapTrace()
+            if info['data'] is not None:
+                return info['data']
+
+            traceName, text = self.unloadedTraces.pop(driver)
+            data = self.readTrace(traceName, text)
+            info['data'] = data
+            # Traces still in the legacy format get rewritten
+            if traceName is not None:
+                self.writtenPersonalBests[driver] = (info['time'], data)
+            return data
+
+
+    def prefetchPersonalBest(self, driver):
+        """
+        Queue the trace of a driver's personal best to be loaded in the
+        background.
+        """
+        info = self.personalBests.get(driver)
+        if info is not None and info['data'] is None and driver not in self.prefetching:
+            self.prefetching.add(driver)
+            if not self.writer.submit(self.loadPersonalBestData, driver):
+                self.prefetching.discard(driver)
+
+
+    def personalBestsSnapshot(self):
+        """
+        Return a copy of the personal bests which is safe to use from the
+        writer thread. Traces are never modified once they are a personal
+        best, so they are shared rather than copied.
+        """
+        return dict((driver, dict(info)) for driver, info in self.personalBests.items())
 
 
-    def writePersonalBests(self):
+    def writePersonalBests(self, personalBests=None):
         """
-        Serialize the personal best information to a config file.
+        Serialize the personal best information to a config file. Only the
+        personal bests which changed since they were last read or written
+        are serialized.
         """
         if logBest != "always":
             return
 
-        config = configparser.ConfigParser()
-        config.read(self.bestLapFile)
+        if personalBests is None:
+            personalBests = self.personalBests
+
+        with self.traceLock:
+            writtenPersonalBests = dict(self.writtenPersonalBests)
+            generation = self.writtenGeneration
 
-        for driver, info in self.personalBests.items():
+        dirty = []
+        for driver, info in personalBests.items():
             if not driver: # driver name might not be set
                 continue
+            if info['data'] is None:
+                # Never loaded, so unchanged
+                continue
+            written = writtenPersonalBests.get(driver)
+            if written is None or written[0] != info['time'] or written[1] is not info['data']:
+                dirty.append((driver, info))
+
+        if not dirty:
+            return
+
+        config = configparser.ConfigParser()
+        config.read(self.bestLapFile)
+
+        for driver, info in dirty:
             section = "PB_" + driver
             try:
                 config.add_section(section)
@@ -801,11 +1316,60 @@ class PartyLaps:
                 pass
             config.set(section, "driver", driver)
             config.set(section, "time", str(info['time']))
-            config.set(section, "data", str(info['data']))
+            self.writeTrace(config, section, self.personalBestTraceName(driver), info['data'])
+
+        writeConfigFile(config, self.bestLapFile)
+
+        with self.traceLock:
+            if generation != self.writtenGeneration:
+                return
+            for driver, info in dirty:
+                self.writtenPersonalBests[driver] = (info['time'], info['data'])
+
+
+    def traceFileName(self, name):
+        """
+        Return the name of the binary trace file ``name`` stored next to the
+        best lap file.
+        """
+        return "{0}.{1}.trace".format(os.path.splitext(self.bestLapFile)[0], name)
+
+
+    def personalBestTraceName(self, driver):
+        """
+        Return the trace name of a driver's personal best. Driver names can
+        contain anything, so they are hex encoded to be safe in file names.
+        """
+        return "pb-" + binascii.hexlify(driver.encode("utf-8")).decode("ascii")
+
 
-        fd = open(self.bestLapFile, "w")
-        config.write(fd)
-        fd.close()
+    def readTrace(self, traceName, text):
+        """
+        Read the trace of a best lap file section, given its "trace" and
+        "data" options. The trace is read from the binary trace file named by
+        the "trace" option, or from the "data" option written by earlier
+        versions and MultiLaps.
+        """
+        if traceName is not None:
+            fileName = os.path.join(os.path.dirname(self.bestLapFile), traceName)
+            try:
+                return readTraceFile(fileName)
+            except (IOError, ValueError) as e:
+                self.ac.log("PartyLaps class: Error reading trace %s: %s" % (fileName, e))
+
+        return LapTrace.loads(text)
+
+
+    def writeTrace(self, config, section, name, trace):
+        """
+        Write a trace to its binary trace file and reference it from the
+        best lap file section. The trace is compressed if the compressTraces
+        setting is on.
+        """
+        fileName = self.traceFileName(name)
+        writeTraceFile(fileName, trace, compressTraces)
+        config.set(section, "trace", os.path.basename(fileName))
+        config.remove_option(section, "data")
 
 
     def personalBest(self):
@@ -820,51 +1384,118 @@ class PartyLaps:
 
     def personalBestData(self):
         """
-        Return the personal best lap time data.
+        Return the personal best lap time data. A trace which is not loaded
+        yet is queued to be loaded and reads as empty until then, as the
+        frame thread must not read files.
         """
         try:
-            return self.personalBests[currentDriver]['data']
+            data = self.personalBests[currentDriver]['data']
         except KeyError:
-            return []
+            return LapTrace()
+        if data is None:
+            self.prefetchPersonalBest(currentDriver)
+            return LapTrace()
+        return data
 
 
     def resetBestLap(self):
         try:
+            # The personal bests are kept in memory, load the traces which
+            # are about to be removed.
+            for driver in list(self.unloadedTraces):
+                self.prefetchPersonalBest(driver)
+
             self.bestLapTime = 0
-            self.bestLapData = []
+            self.bestLapData = LapTrace()
+
+            # A write in progress must not mark the files it is writing as
+            # written, they are about to be removed.
+            with self.traceLock:
+                self.writtenGeneration += 1
+
+            self.resetJournal()
+            # Writes already queued would recreate the files, so they are
+            # removed after them.
+            self.writer.submit(self.removeBestLapFiles)
 
+        except Exception as e:
+            self.ac.log("PartyLaps class: Error in resetBestLap: %s" % e)
+
+    def removeBestLapFiles(self):
+        """
+        Remove the best lap file, which also held the personal bests, and
+        their traces. This runs on the writer thread.
+        """
+        try:
             if os.path.exists(self.bestLapFile):
                 os.remove(self.bestLapFile)
 
+            directory, base = os.path.split(os.path.splitext(self.bestLapFile)[0])
+            traceName = re.compile(re.escape(base) + r"\.(best|pb-[0-9a-f]*)\.trace$")
+            for fileName in os.listdir(directory or "."):
+                if traceName.match(fileName):
+                    os.remove(os.path.join(directory, fileName))
+
+            self.writtenBestLap = None
+            with self.traceLock:
+                self.writtenPersonalBests = {}
+                self.writtenGeneration += 1
+
         except Exception as e:
-            self.ac.log("PartyLaps class: Error in resetBestLap: %s" % e)
+            self.ac.log("PartyLaps class: Error in removeBestLapFiles: %s" % e)
+
+    def persistBestLap(self):
+        """
+        Queue the best lap and the personal bests to be written.
+        """
+        self.writer.submit(self.writeBestLap,
+                (self.bestLapTime, self.bestLapHolder, self.bestLapData),
+                self.personalBestsSnapshot())
+
+
+    def writeBestLap(self, bestLap=None, personalBests=None):
+        """
+        Write the best lap, given as a (time, holder, trace) snapshot, and the
+        personal bests.
+        """
+        if bestLap is None:
+            bestLap = (self.bestLapTime, self.bestLapHolder, self.bestLapData)
+        bestLapTime, bestLapHolder, bestLapData = bestLap
 
-    def writeBestLap(self):
         try:
-            if logBest == "always" and self.bestLapTime and len(self.bestLapData) > 0:
+            if (logBest == "always" and bestLapTime and len(bestLapData) > 0
+                    and not self.isWrittenBestLap(bestLap)):
                 configBestLap = configparser.ConfigParser()
+                configBestLap.read(self.bestLapFile)
 
-                if os.path.exists(self.bestLapFile):
-                    configBestLap.read(self.bestLapFile)
-                    lastBest = configBestLap.getint("TIME", "best")
-                    if lastBest != 0 and lastBest < self.bestLapTime:
-                        return
-                else:
-                    configBestLap.add_section("TIME")
-                    configBestLap.add_section("DATA")
+                lastBest = configBestLap.getint("TIME", "best", fallback=0)
+                if lastBest != 0 and lastBest < bestLapTime:
+                    return
 
-                configBestLap.set("TIME", "best", str(self.bestLapTime))
-                configBestLap.set("TIME", "holder", str(self.bestLapHolder))
-                configBestLap.set("DATA", "data", str(self.bestLapData))
+                for section in ("TIME", "DATA"):
+                    if not configBestLap.has_section(section):
+                        configBestLap.add_section(section)
 
-                fd = open(self.bestLapFile, "w")
-                configBestLap.write(fd)
-                fd.close()
+                configBestLap.set("TIME", "best", str(bestLapTime))
+                configBestLap.set("TIME", "holder", str(bestLapHolder))
+                self.writeTrace(configBestLap, "DATA", "best", bestLapData)
+
+                writeConfigFile(configBestLap, self.bestLapFile)
+                self.writtenBestLap = bestLap
 
         except Exception as e:
             self.ac.log("PartyLaps class: Error in writeBestLap: %s" % e)
 
-        self.writePersonalBests()
+        self.writePersonalBests(personalBests)
+
+
+    def isWrittenBestLap(self, bestLap):
+        """
+        Return whether the (time, holder, trace) best lap is the one on disk.
+        """
+        written = self.writtenBestLap
+        return (written is not None and written[0] == bestLap[0]
+                and written[1] == bestLap[1] and written[2] is bestLap[2])
 
 '''
 Show header:    Yes       Change
@@ -907,6 +1538,9 @@ class PartyLaps_config:
             self.topPadding = topPadding
 
         self.fontSize = fontSize
+        # The last text set in each value label
+        self.texts = {}
+        self.driversPollTime = 0
 
         widthLeft       = fontSize*8
         widthCenter     = fontSize*5
@@ -1124,62 +1758,126 @@ class PartyLaps_config:
         ac.setPosition(self.driversInput, spacing, self.topPadding + rowIndex*(fontSize*1.5+spacing))
         ac.setSize(self.driversInput, widthLeft + widthCenter + widthRight, fontSize*1.5)
 
+        # The row displaying each parameter
+        self.rows = {
+            "showHeader": self.showHeaderId,
+            "fontSize": self.fontSizeId,
+            "opacity": self.opacityId,
+            "showBorder": self.showBorderId,
+            "lapDisplayedCount": self.lapCountId,
+            "showDelta": self.showDeltaId,
+            "deltaColor": self.deltaColorId,
+            "redAt": self.redAtId,
+            "greenAt": self.greenAtId,
+            "showCurrent": self.showCurrentId,
+            "reference": self.referenceId,
+            "showReference": self.showReferenceId,
+            "showTotal": self.showTotalId,
+            "updateTime": self.refreshId,
+            "logLaps": self.logLapsId,
+            "logBest": self.logBestId,
+            "bestLapTime": self.resetBestLapId,
+            "lockBest": self.lockBestId,
+        }
+
 
     def onRenderCallback(self, deltaT):
         # Update background in case the app has been moved
         ac.setBackgroundOpacity(self.window, 1.0)
 
-    def updateView(self):
-        ac.setText(self.centerLabel[self.showHeaderId], yesOrNo(showHeader))
-        ac.setText(self.centerLabel[self.fontSizeId],   str(fontSize))
-        ac.setText(self.centerLabel[self.opacityId],   "{0} %".format(opacity))
-        ac.setText(self.centerLabel[self.showBorderId], yesOrNo(showBorder))
-        ac.setText(self.centerLabel[self.lapCountId],   str(lapDisplayedCount))
-        ac.setText(self.centerLabel[self.showDeltaId],  yesOrNo(showDelta))
-        ac.setText(self.centerLabel[self.deltaColorId], deltaColor.title())
-        ac.setText(self.centerLabel[self.redAtId],
-                "{:+.1f} s".format(float(redAt)/1000))
-        ac.setText(self.centerLabel[self.greenAtId],
-                "{:+.1f} s".format(float(greenAt)/1000))
-        ac.setText(self.centerLabel[self.showCurrentId], yesOrNo(showCurrent))
-
-        if reference == "best":
-            ac.setText(self.centerLabel[self.referenceId], "Best lap")
-        elif reference == "median":
-            ac.setText(self.centerLabel[self.referenceId], "Median")
-        elif reference == "top25":
-            ac.setText(self.centerLabel[self.referenceId], "Top 25%")
-        elif reference == "top50":
-            ac.setText(self.centerLabel[self.referenceId], "Top 50%")
-        elif reference == "top75":
-            ac.setText(self.centerLabel[self.referenceId], "Top 75%")
+    def updateView(self, names=None):
+        """
+        Display the value of the parameters ``names``, or of every parameter.
+        Only the labels whose text changed are set.
+        """
+        if names is None:
+            names = self.rows
+        for name in names:
+            text = self.valueText(name)
+            if text is None:
+                continue
+            label = self.centerLabel[self.rows[name]]
+            if self.texts.get(label) != text:
+                self.texts[label] = text
+                ac.setText(label, text)
 
-        ac.setText(self.centerLabel[self.showReferenceId], yesOrNo(showReference))
-        ac.setText(self.centerLabel[self.showTotalId], yesOrNo(showTotal))
 
-        if updateTime == 0:
-            ac.setText(self.centerLabel[self.refreshId], "Min")
-        elif updateTime == 50:
-            ac.setText(self.centerLabel[self.refreshId], "0.05 s")
-        else:
-            ac.setText(self.centerLabel[self.refreshId], "{:.1f} s".format(float(updateTime)/1000))
+    def valueText(self, name):
+        """
+        Return the text displaying the value of a parameter.
+        """
+        if name == "showHeader":
+            return yesOrNo(showHeader)
+        elif name == "fontSize":
+            return str(fontSize)
+        elif name == "opacity":
+            return "{0} %".format(opacity)
+        elif name == "showBorder":
+            return yesOrNo(showBorder)
+        elif name == "lapDisplayedCount":
+            return str(lapDisplayedCount)
+        elif name == "showDelta":
+            return yesOrNo(showDelta)
+        elif name == "deltaColor":
+            return deltaColor.title()
+        elif name == "redAt":
+            return "{:+.1f} s".format(float(redAt)/1000)
+        elif name == "greenAt":
+            return "{:+.1f} s".format(float(greenAt)/1000)
+        elif name == "showCurrent":
+            return yesOrNo(showCurrent)
+        elif name == "reference":
+            if reference == "best":
+                return "Best lap"
+            elif reference == "median":
+                return "Median"
+            elif reference == "top25":
+                return "Top 25%"
+            elif reference == "top50":
+                return "Top 50%"
+            elif reference == "top75":
+                return "Top 75%"
+        elif name == "showReference":
+            return yesOrNo(showReference)
+        elif name == "showTotal":
+            return yesOrNo(showTotal)
+        elif name == "updateTime":
+            if updateTime == 0:
+                return "Min"
+            elif updateTime == 50:
+                return "0.05 s"
+            else:
+                return "{:.1f} s".format(float(updateTime)/1000)
+        elif name == "logLaps":
+            return yesOrNo(logLaps)
+        elif name == "logBest":
+            return logBest.title()
+        elif name == "bestLapTime":
+            return timeToString(partyLapsApp.bestLapTime)
+        elif name == "lockBest":
+            if lockBest:
+                return "Locked"
+            else:
+                return "Unlocked"
+        return None
 
-        ac.setText(self.centerLabel[self.logLapsId], yesOrNo(logLaps))
-        ac.setText(self.centerLabel[self.logBestId], logBest.title())
-        ac.setText(self.centerLabel[self.resetBestLapId], timeToString(partyLapsApp.bestLapTime))
 
-        if lockBest:
-            ac.setText(self.centerLabel[self.lockBestId], "Locked")
-        else:
-            ac.setText(self.centerLabel[self.lockBestId], "Unlocked")
+    def pollDriversInput(self, deltaT):
+        """
+        Store the drivers list if it has been changed. The input is only read
+        every ``driversPollTime`` seconds.
+        """
+        self.driversPollTime += deltaT
+        if self.driversPollTime < driversPollTime:
+            return
+        self.driversPollTime = 0
 
-        # Store new drivers list if it has been changed
         global driversList, driversListText
         newDriversListText = ac.getText(self.driversInput)
         if newDriversListText != driversListText:
             driversListText = newDriversListText
             driversList = explodeCSL(driversListText)
-            writeParameters()
+            markParametersChanged()
 
 
 class PartyDelta(object):
@@ -1213,6 +1911,9 @@ class PartyDelta(object):
         ac.setFontSize(self.pbDeltaLabel, self.pbFontSize)
         ac.setFontAlignment(self.pbDeltaLabel, "center")
 
+        # The last text and colour of each label, to skip sending them again
+        self.texts = {}
+        self.colors = {}
 
 
     def onRenderCallback(self):
@@ -1234,6 +1935,9 @@ class PartyDelta(object):
         """
         Set the best lap delta.
         """
+        if self.texts.get(isPB) == delta:
+            return
+        self.texts[isPB] = delta
         ac.setText(self.deltaLabel if not isPB else self.pbDeltaLabel, delta)
 
 
@@ -1241,10 +1945,62 @@ class PartyDelta(object):
         """
         Set the delta color.
         """
+        color = (r, g, b, s)
+        if self.colors.get(isPB) == color:
+            return
+        self.colors[isPB] = color
         ac.setFontColor(self.deltaLabel if not isPB else self.pbDeltaLabel,
                 r, g, b, s)
 
 
+class PartyProfile(object):
+    """
+    Display the profiler statistics in a debug window.
+    """
+
+    fontSize = 12
+    # Seconds between refreshes
+    refreshTime = 1.0
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.time = 0
+        self.window = ac.newApp("PartyLaps_profile")
+        ac.setTitle(self.window, "PartyLaps profile")
+
+        self.table = ACTable(ac, self.window)
+        self.table.setSize(5, 1 + len(profiler.histograms))
+        self.table.setTablePadding(5, 30)
+        self.table.setCellSpacing(5, 2)
+        self.table.setColumnWidths(10, 4, 4, 4, 4)
+        self.table.setColumnAlignments("left", "right", "right", "right", "right")
+        self.table.setFontSize(self.fontSize)
+        self.table.draw()
+
+        width, height = self.table.getDimensions()
+        ac.setSize(self.window, width, height)
+
+        for column, title in enumerate(("Function", "Calls", "p50 us", "p99 us", "Max us")):
+            self.table.setCellValue(title, column, 0)
+
+
+    def update(self, deltaT):
+        """
+        Refresh the statistics every ``refreshTime``.
+        """
+        self.time += deltaT
+        if self.time < self.refreshTime:
+            return
+        self.time = 0
+
+        for row, (name, count, p50, p99, maximum) in enumerate(self.profiler.stats(), 1):
+            self.table.setCellValue(name, 0, row)
+            self.table.setCellValue(str(count), 1, row)
+            self.table.setCellValue("%.1f" % p50, 2, row)
+            self.table.setCellValue("%.1f" % p99, 3, row)
+            self.table.setCellValue("%.1f" % maximum, 4, row)
+
+
 def toggleHeader(dummy, variable):
     global showHeader
 
@@ -1253,14 +2009,14 @@ def toggleHeader(dummy, variable):
     else:
         showHeader = 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("showHeader")
 
 def fontSizePlus(dummy, variable):
     global fontSize
 
     fontSize += 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("fontSize")
 
 def fontSizeMinus(dummy, variable):
     global fontSize
@@ -1268,7 +2024,7 @@ def fontSizeMinus(dummy, variable):
     if fontSize > 6:
         fontSize -= 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("fontSize")
 
 def opacityPlus(dummy, variable):
     global opacity
@@ -1276,7 +2032,7 @@ def opacityPlus(dummy, variable):
     if opacity < 100:
         opacity += 10
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("opacity")
 
 def opacityMinus(dummy, variable):
     global opacity
@@ -1284,7 +2040,7 @@ def opacityMinus(dummy, variable):
     if opacity >= 10:
         opacity -= 10
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("opacity")
 
 def toggleBorder(dummy, variable):
     global showBorder
@@ -1294,7 +2050,7 @@ def toggleBorder(dummy, variable):
     else:
         showBorder = 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("showBorder")
 
 def lapCountPlus(dummy, variable):
     global lapDisplayedCount
@@ -1302,7 +2058,7 @@ def lapCountPlus(dummy, variable):
     if lapDisplayedCount < lapLabelCount:
         lapDisplayedCount += 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("lapDisplayedCount")
 
 def lapCountMinus(dummy, variable):
     global lapDisplayedCount
@@ -1310,7 +2066,7 @@ def lapCountMinus(dummy, variable):
     if lapDisplayedCount > 0:
         lapDisplayedCount -= 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("lapDisplayedCount")
 
 def toggleDelta(dummy, variable):
     global showDelta
@@ -1320,7 +2076,7 @@ def toggleDelta(dummy, variable):
     else:
         showDelta = 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("showDelta")
 
 def toggleColor(dummy, variable):
     global deltaColor
@@ -1330,7 +2086,7 @@ def toggleColor(dummy, variable):
     elif deltaColor == "white":
         deltaColor = "yellow"
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("deltaColor")
 
 def redAtPlus(dummy, variable):
     global redAt
@@ -1342,7 +2098,7 @@ def redAtPlus(dummy, variable):
     elif redAt < 10000:
         redAt += 1000
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("redAt")
 
 def redAtMinus(dummy, variable):
     global redAt
@@ -1354,7 +2110,7 @@ def redAtMinus(dummy, variable):
     elif redAt > 0:
         redAt -= 100
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("redAt")
 
 def greenAtPlus(dummy, variable):
     global greenAt
@@ -1366,7 +2122,7 @@ def greenAtPlus(dummy, variable):
     elif greenAt < 0:
         greenAt += 100
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("greenAt")
 
 def greenAtMinus(dummy, variable):
     global greenAt
@@ -1378,7 +2134,7 @@ def greenAtMinus(dummy, variable):
     elif greenAt > -10000:
         greenAt -= 1000
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("greenAt")
 
 def toggleRefSource(dummy, variable):
     global reference
@@ -1393,7 +2149,7 @@ def toggleRefSource(dummy, variable):
     elif reference == "top75":
         reference = "best"
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("reference")
 
 def toggleCurrent(dummy, variable):
     global showCurrent
@@ -1403,7 +2159,7 @@ def toggleCurrent(dummy, variable):
     else:
         showCurrent = 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("showCurrent")
 
 def toggleTotal(dummy, variable):
     global showTotal
@@ -1413,7 +2169,7 @@ def toggleTotal(dummy, variable):
     else:
         showTotal = 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("showTotal")
 
 def toggleRef(dummy, variable):
     global showReference
@@ -1423,7 +2179,7 @@ def toggleRef(dummy, variable):
     else:
         showReference = 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("showReference")
 
 def refreshPlus(dummy, variable):
     global updateTime
@@ -1437,7 +2193,7 @@ def refreshPlus(dummy, variable):
     else:
         updateTime = 200
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("updateTime")
 
 def refreshMinus(dummy, variable):
     global updateTime
@@ -1451,7 +2207,7 @@ def refreshMinus(dummy, variable):
     else:
         updateTime = 0
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("updateTime")
 
 def toggleLogLaps(dummy, variable):
     global logLaps
@@ -1461,7 +2217,7 @@ def toggleLogLaps(dummy, variable):
     else:
         logLaps = 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("logLaps")
 
 def toggleLogBest(dummy, variable):
     global logBest
@@ -1472,7 +2228,7 @@ def toggleLogBest(dummy, variable):
     elif logBest == "never":
         logBest = "always"
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("logBest")
 
 def toggleLockBest(dummy, variable):
     global lockBest
@@ -1481,28 +2237,11 @@ def toggleLockBest(dummy, variable):
     else:
         lockBest = 1
 
-    refreshAndWriteParameters()
+    refreshAndWriteParameters("lockBest")
 
 def resetBestLap(dummy, variable):
     partyLapsApp.resetBestLap()
-    refreshAndWriteParameters()
-
-def timeToString(time):
-    try:
-        if time <= 0:
-            return "-:--.---"
-        else:
-            return "{:d}:{:0>2d}.{:0>3d}".format(int(time/60000), int((time%60000)/1000), int(time%1000))
-    except Exception as e:
-        ac.log("PartyLaps: Error in timeToString: %s" % e)
-        return "-:--.---"
-
-def deltaToString(time):
-    try:
-        return "{:+.3f}".format(float(time)/1000)
-    except Exception as e:
-        ac.log("PartyLaps: Error in deltaToString: %s" % e)
-        return "+0.000"
+    refreshAndWriteParameters("bestLapTime")
 
 def yesOrNo(value):
     if value:
@@ -1510,48 +2249,102 @@ def yesOrNo(value):
     else:
         return "No"
 
-def setDelta(label, delta, deltaApp=None, isPB=False):
+def setDelta(table, iX, iY, delta, deltaApp=None, isPB=False):
+    """
+    Display a delta and its color in a table cell, and in the delta app if
+    it is given.
+    """
     deltaStr = deltaToString(delta)
-    ac.setText(label, deltaStr)
+    table.setCellValue(deltaStr, iX, iY)
     if deltaApp:
         deltaApp.setDelta(deltaStr, isPB)
 
+    color = deltaColors.lookup(delta)
+    if color is None:
+        return
+
+    table.setFontColor(color[0], color[1], color[2], 1, iX, iY)
+    if deltaApp:
+        deltaApp.setColor(color[0], color[1], color[2], 1, isPB)
+
+
+def deltaToColor(delta):
+    """
+    Return the (r, g, b) color of a delta, or None if the color scheme is
+    unknown.
+    """
     if delta >= redAt:
-        ac.setFontColor(label, 1, 0, 0, 1)
-        if deltaApp:
-            deltaApp.setColor(1, 0, 0, 1, isPB)
+        return (1, 0, 0)
     elif delta <= greenAt:
-        ac.setFontColor(label, 0, 1, 0, 1)
-        if deltaApp:
-            deltaApp.setColor(0, 1, 0, 1, isPB)
-    else:
-        if deltaColor == "yellow":
-            if delta > 0:
-                # color factor [0..1]
-                colorFactor = float(delta)/redAt
-                ac.setFontColor(label, 1, 1-colorFactor, 0, 1)
-                if deltaApp:
-                    deltaApp.setColor(1, 1-colorFactor, 0, 1, isPB)
-            else:
-                # color factor [0..1]
-                colorFactor = float(delta)/greenAt
-                ac.setFontColor(label, 1-colorFactor, 1, 0, 1)
-                if deltaApp:
-                    deltaApp.setColor(1-colorFactor, 1, 0, 1, isPB)
-
-        elif deltaColor == "white":
-            if delta > 0:
-                # color factor [0..1]
-                colorFactor = float(delta)/redAt
-                ac.setFontColor(label, 1, 1-colorFactor, 1-colorFactor, 1)
-                if deltaApp:
-                    deltaApp.setColor(1, 1-colorFactor, 1-colorFactor, 1, isPB)
-            else:
-                # color factor [0..1]
-                colorFactor = float(delta)/greenAt
-                ac.setFontColor(label, 1-colorFactor, 1, 1-colorFactor, 1)
-                if deltaApp:
-                    deltaApp.setColor(1-colorFactor, 1, 1-colorFactor, 1, isPB)
+        return (0, 1, 0)
+    elif deltaColor == "yellow":
+        if delta > 0:
+            # color factor [0..1]
+            colorFactor = float(delta)/redAt
+            return (1, 1-colorFactor, 0)
+        else:
+            # color factor [0..1]
+            colorFactor = float(delta)/greenAt
+            return (1-colorFactor, 1, 0)
+    elif deltaColor == "white":
+        if delta > 0:
+            # color factor [0..1]
+            colorFactor = float(delta)/redAt
+            return (1, 1-colorFactor, 1-colorFactor)
+        else:
+            # color factor [0..1]
+            colorFactor = float(delta)/greenAt
+            return (1-colorFactor, 1, 1-colorFactor)
+    return None
+
+
+class DeltaColors(object):
+    """
+    A lookup table of the colors given by ``deltaToColor`` to the deltas
+    between ``greenAt`` and ``redAt``, in steps of ``step`` milliseconds.
+    Deltas in the same step share a color, so a label whose delta only moves
+    a little keeps the same color and is not sent it again.
+
+    The table is rebuilt whenever the color settings change.
+    """
+
+    def __init__(self, step=None):
+        self.step = step or deltaColorStep
+        self.settings = None
+        self.colors = []
+
+
+    def build(self):
+        """
+        Compute the colors for the current color settings.
+        """
+        self.settings = (redAt, greenAt, deltaColor)
+        self.colors = [deltaToColor(delta)
+                for delta in range(greenAt, redAt, self.step)]
+
+
+    def lookup(self, delta):
+        """
+        Return the (r, g, b) color of a delta, or None if the color scheme is
+        unknown.
+        """
+        if self.settings != (redAt, greenAt, deltaColor):
+            self.build()
+        if delta >= redAt or delta <= greenAt:
+            return deltaToColor(delta)
+        return self.colors[int(delta - greenAt) // self.step]
+
+
+deltaColors = DeltaColors()
+
+
+def writeConfigFile(config, fileName):
+    """
+    Write a ConfigParser to a file, atomically.
+    """
+    text = io.StringIO()
+    config.write(text)
+    atomicWrite(fileName, text.getvalue())
 
 
 def explodeCSL(string, sep=','):
@@ -1562,12 +2355,58 @@ def onClickDriver(*args):
     # Callbacks must be first-order functions in the main file :-/
     global currentDriver
     currentDriver = cycleDriver(driversList, currentDriver)
-    writeParameters()
+    markParametersChanged()
     partyLapsApp.setDriverCellValues()
     partyLapsApp.setPersonalBestCellValues()
+    partyLapsApp.prefetchPersonalBest(currentDriver)
+    partyLapsApp.prefetchPersonalBest(cycleDriver(driversList, currentDriver))
+    return 1
+
+
+def onClickLapsUp(*args):
+    partyLapsApp.scrollLaps(-1)
     return 1
 
 
+def onClickLapsDown(*args):
+    partyLapsApp.scrollLaps(1)
+    return 1
+
+
+def onClickLapsCycle(*args):
+    # With a single lap row, go back one lap at a time then to the last lap
+    if partyLapsApp.firstLapIndex() == 0:
+        partyLapsApp.scrollLaps(len(partyLapsApp.laps))
+    else:
+        partyLapsApp.scrollLaps(-1)
+    return 1
+
+
+def onClickLapRow(row):
+    """
+    Scroll the laps when the number in the first or last lap row is clicked,
+    given the rows displayed now. The same label can have been another row
+    when its listener was added.
+    """
+    if row == 1 and lapDisplayedCount == 1:
+        return onClickLapsCycle()
+    if row == 1 and lapDisplayedCount > 1:
+        return onClickLapsUp()
+    if row == lapDisplayedCount and row > 1:
+        return onClickLapsDown()
+    return 1
+
+
+def lapRowListener(row):
+    def onClickLapNumber(*args):
+        return onClickLapRow(row)
+    return onClickLapNumber
+
+
+# The listener of the number in each lap row, the same one on every draw
+onClickLapRows = [lapRowListener(row) for row in range(lapLabelCount + 1)]
+
+
 def cycleDriver(drivers, currentDriver):
     """
     Return the next driver in the drivers list, or the first driver if it is
@@ -1584,27 +2423,97 @@ def cycleDriver(drivers, currentDriver):
     return drivers[0]
 
 
-def calculateDelta(position, currentTime, lapData):
+class DeltaGrid(object):
     """
-    Calculate the delta to the reference data.
+    A lookup table over a reference lap. The lap is divided into
+    ``deltaGridSize`` equal buckets and for each bucket we store the index of
+    the first sample which falls in it or after it, so finding our position
+    in the reference lap is an index calculation followed by a walk over the
+    few samples in a single bucket.
+
+    The table is rebuilt whenever a different reference lap is looked up,
+    e.g. after a new best lap or a driver change. With a ``writer`` the
+    rebuild runs on the writer thread and the reference lap is searched by
+    bisection until the new table is swapped in.
+    """
+
+    def __init__(self, gridSize=None, writer=None):
+        self.gridSize = gridSize or deltaGridSize
+        self.writer = writer
+        # The reference lap, its length and its table, swapped in together
+        self.built = (None, 0, array('i'))
+        self.pending = (None, 0)
+
+
+    def build(self, lapData, positions):
+        """
+        Resample ``positions``, a snapshot of the positions of ``lapData``,
+        onto the grid.
+        """
+        gridSize = self.gridSize
+        buckets = [int(position * gridSize) for position in positions]
+        grid = array('i', [bisect_left(buckets, bucket)
+                for bucket in range(gridSize + 1)])
+        self.built = (lapData, len(positions), grid)
+
+
+    def seek(self, position, lapData):
+        """
+        Return the index of the first sample whose position is not below
+        ``position``, as the original linear scan did.
+        """
+        builtData, length, grid = self.built
+        if lapData is not builtData or len(lapData) != length:
+            pendingData, pendingLength = self.pending
+            if lapData is not pendingData or len(lapData) != pendingLength:
+                self.pending = (lapData, len(lapData))
+                positions = lapData.positions[:]
+                if self.writer is None:
+                    self.build(lapData, positions)
+                elif not self.writer.submit(self.build, lapData, positions):
+                    self.pending = (None, 0)
+            builtData, length, grid = self.built
+            if lapData is not builtData or len(lapData) != length:
+                return lapData.bisect(position)
+
+        bucket = int(position * self.gridSize)
+        if bucket < 0:
+            bucket = 0
+        elif bucket > self.gridSize:
+            bucket = self.gridSize
+
+        positions = lapData.positions
+        index = grid[bucket]
+        while index < length and position > positions[index]:
+            index += 1
+        return index
+
+
+def calculateDelta(position, currentTime, lapData, grid=None):
+    """
+    Calculate the delta to the reference data. If a ``DeltaGrid`` is given
+    it is used to find our position in the reference lap without searching.
     """
     # If there is a best lap, calculate the interpolation
     if len(lapData):
 
         # Check where is our actual position in the best lap data
-        index = 0
-        while position > lapData[index][0]:
-            index += 1
+        if grid is None:
+            index = lapData.bisect(position)
+        else:
+            index = grid.seek(position, lapData)
 
-        if index == 0:
+        if index == 0 or index == len(lapData):
             return 0
         else:
             # Interpolation
-            bestLapDeltaPos  = lapData[index][0] - lapData[index-1][0]
-            bestLapDeltaTime = lapData[index][1] - lapData[index-1][1]
-            currentDeltaPos  = position - lapData[index-1][0]
+            positions = lapData.positions
+            times = lapData.times
+            bestLapDeltaPos  = positions[index] - positions[index-1]
+            bestLapDeltaTime = times[index] - times[index-1]
+            currentDeltaPos  = position - positions[index-1]
             currentDeltaTime = currentDeltaPos*bestLapDeltaTime/bestLapDeltaPos
-            return currentTime - lapData[index-1][1] - currentDeltaTime
+            return currentTime - times[index-1] - currentDeltaTime
     else:
         # No best lap, no performance delta.
         return 0
@@ -20,6 +20,20 @@ some_app.py::
 
     print(info.graphics.tyreCompound, info.physics.rpms, info.static.playerNick)
 
+The pages are written by the game while they are being read. To read
+several fields from the same point in time, take a snapshot once per update
+and read the copies::
+
+    snapshot = info.snapshot()
+    if snapshot.advanced:
+        print(snapshot.graphics.status, snapshot.physics.gas, snapshot.physics.brake)
+
+``info`` is only connected to the game's shared memory when it is first
+used, so the module can be imported anywhere. To read pages recorded to
+files, or pages held in memory, configure it with another backend first::
+
+    info.configure(FilePages("recording"))
+
 
 Do whatever you want with this code!
 WBR, Rombik :)
@@ -27,6 +41,7 @@ WBR, Rombik :)
 import mmap
 import functools
 import ctypes
+import os
 from ctypes import c_int32, c_float, c_wchar
 
 
@@ -135,24 +150,174 @@ class SPageFileStatic(ctypes.Structure):
     ]
 
 
-class SimInfo:
+# Number of times a page is copied again when the game wrote it during the
+# copy
+SNAPSHOT_RETRIES = 3
+
+
+def copyPage(snapshot, page):
+    """
+    Copy a live page into a snapshot structure of the same type with a single
+    memmove. The packetId is read before and after the copy, and the copy is
+    retried if the game has written the page in between. Return False if the
+    copy could not be made consistent, in which case the last attempt is
+    kept.
+    """
+    size = ctypes.sizeof(page)
+    for attempt in range(SNAPSHOT_RETRIES):
+        packetId = page.packetId
+        ctypes.memmove(ctypes.addressof(snapshot), ctypes.addressof(page), size)
+        if snapshot.packetId == packetId and page.packetId == packetId:
+            return True
+    return False
+
+
+class SimSnapshot:
+    """
+    Copies of the physics and graphics pages, taken by ``SimInfo.snapshot``.
+    """
     def __init__(self):
-        self._acpmf_physics = mmap.mmap(0, ctypes.sizeof(SPageFilePhysics), "acpmf_physics")
-        self._acpmf_graphics = mmap.mmap(0, ctypes.sizeof(SPageFileGraphic), "acpmf_graphics")
-        self._acpmf_static = mmap.mmap(0, ctypes.sizeof(SPageFileStatic), "acpmf_static")
-        self.physics = SPageFilePhysics.from_buffer(self._acpmf_physics)
-        self.graphics = SPageFileGraphic.from_buffer(self._acpmf_graphics)
-        self.static = SPageFileStatic.from_buffer(self._acpmf_static)
+        self.physics = SPageFilePhysics()
+        self.graphics = SPageFileGraphic()
+        # Whether either packetId changed since the previous snapshot
+        self.advanced = False
+        # Whether both copies were made without the game writing them
+        self.consistent = True
+
+
+PAGES = (
+    ("physics", SPageFilePhysics),
+    ("graphics", SPageFileGraphic),
+    ("static", SPageFileStatic),
+)
+
+
+class TagPages:
+    """
+    The pages shared by the game, Windows named mappings.
+    """
+    def __init__(self):
+        self.buffers = {}
+        for name, struct in PAGES:
+            self.buffers[name] = mmap.mmap(0, ctypes.sizeof(struct), "acpmf_" + name)
 
     def close(self):
-        self._acpmf_physics.close()
-        self._acpmf_graphics.close()
-        self._acpmf_static.close()
+        for buffer in self.buffers.values():
+            buffer.close()
+
+
+class FilePages:
+    """
+    Pages mapped from the files acpmf_physics, acpmf_graphics and
+    acpmf_static in a directory. Missing files are created, zeroed.
+    """
+    def __init__(self, directory):
+        self.files = []
+        self.buffers = {}
+        for name, struct in PAGES:
+            size = ctypes.sizeof(struct)
+            fileName = os.path.join(directory, "acpmf_" + name)
+            if not os.path.exists(fileName):
+                with open(fileName, "wb") as fd:
+                    fd.write(bytes(size))
+            fd = open(fileName, "r+b")
+            self.files.append(fd)
+            self.buffers[name] = mmap.mmap(fd.fileno(), size)
+
+    def close(self):
+        for buffer in self.buffers.values():
+            buffer.close()
+        for fd in self.files:
+            fd.close()
+
+
+class BufferPages:
+    """
+    Pages held in memory, for tests and replaying recorded data.
+    """
+    def __init__(self):
+        self.buffers = {}
+        for name, struct in PAGES:
+            self.buffers[name] = bytearray(ctypes.sizeof(struct))
+
+    def close(self):
+        pass
+
+
+class SimInfo:
+    def __init__(self, backend=None):
+        self._backend = None
+        if backend is None:
+            backend = TagPages()
+        self.physics = SPageFilePhysics.from_buffer(backend.buffers["physics"])
+        self.graphics = SPageFileGraphic.from_buffer(backend.buffers["graphics"])
+        self.static = SPageFileStatic.from_buffer(backend.buffers["static"])
+        # Only once the structures exist, for close to remove them
+        self._backend = backend
+        self._snapshot = SimSnapshot()
+        self._snapshot.physics.packetId = -1
+        self._snapshot.graphics.packetId = -1
+
+    def snapshot(self):
+        """
+        Copy the physics and graphics pages and return the ``SimSnapshot``
+        holding the copies. The same snapshot object is updated on every
+        call, so this allocates nothing.
+        """
+        snapshot = self._snapshot
+        physicsId = snapshot.physics.packetId
+        graphicsId = snapshot.graphics.packetId
+        physicsConsistent = copyPage(snapshot.physics, self.physics)
+        graphicsConsistent = copyPage(snapshot.graphics, self.graphics)
+        snapshot.consistent = physicsConsistent and graphicsConsistent
+        snapshot.advanced = (snapshot.physics.packetId != physicsId
+                or snapshot.graphics.packetId != graphicsId)
+        return snapshot
+
+    def close(self):
+        if self._backend is None:
+            return
+        # The structures must let go of the buffers before they are closed
+        del self.physics, self.graphics, self.static
+        self._backend.close()
+        self._backend = None
 
     def __del__(self):
         self.close()
 
-info = SimInfo()
+
+class LazySimInfo:
+    """
+    Stands in for a ``SimInfo``, which is only created when first used.
+    Once closed, it must be configured again before it is used.
+    """
+    def __init__(self):
+        self._info = None
+        self._closed = False
+
+    def configure(self, backend=None):
+        """
+        Use the pages of ``backend``, or of the game if it is None, from now
+        on.
+        """
+        self.close()
+        self._info = SimInfo(backend)
+        self._closed = False
+
+    def close(self):
+        self._closed = True
+        if self._info is not None:
+            self._info.close()
+            self._info = None
+
+    def __getattr__(self, name):
+        if self._info is None:
+            if self._closed:
+                raise ValueError("The shared memory is closed, configure it before using it again")
+            self._info = SimInfo()
+        return getattr(self._info, name)
+
+info = LazySimInfo()
 
 
 def demo():
@@ -0,0 +1,123 @@
+"""
+Opt-in timing of the hot functions, to find out what they cost in the game.
+
+Functions are instrumented by replacing them with a wrapper, so nothing is
+measured, and nothing costs anything, unless the profiler has been started.
+Each function gets a histogram of its run times in power of two buckets of
+nanoseconds, which is enough for percentiles without keeping every sample.
+"""
+import functools
+import time
+
+try:
+    _clock = time.perf_counter_ns
+except AttributeError:
+    # Python 3.3, as shipped with the game
+    def _clock():
+        return int(time.perf_counter() * 1000000000)
+
+
+class Histogram(object):
+    """
+    Run times in nanoseconds, counted in buckets: bucket ``n`` holds the times
+    of ``n`` bits, from 2**(n-1) to 2**n - 1.
+    """
+
+    def __init__(self):
+        self.counts = [0] * 64
+        self.count = 0
+        self.max = 0
+
+
+    def record(self, nanoseconds):
+        self.counts[min(int(nanoseconds).bit_length(), 63)] += 1
+        self.count += 1
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+
+    def percentile(self, percent):
+        """
+        Return an upper bound of the given percentile, the top of its bucket.
+        """
+        if not self.count:
+            return 0
+        rank = self.count * percent / 100.0
+        seen = 0
+        for bits, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min((1 << bits) - 1, self.max)
+        return self.max
+
+
+class Profiler(object):
+    """
+    Histograms of the run times of instrumented functions, by name.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or _clock
+        self.histograms = {}
+
+
+    def wrap(self, name, function):
+        """
+        Return ``function`` wrapped to record its run times under ``name``.
+        """
+        histogram = self.histograms.setdefault(name, Histogram())
+        clock = self.clock
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.record(clock() - start)
+
+        return wrapper
+
+
+    def instrument(self, owner, attribute, name=None):
+        """
+        Replace the function ``attribute`` of ``owner``, a module or a class,
+        by a wrapper recording its run times.
+        """
+        function = getattr(owner, attribute)
+        setattr(owner, attribute, self.wrap(name or attribute, function))
+
+
+    def stats(self):
+        """
+        Return a (name, calls, p50, p99, max) tuple per function, with times
+        in microseconds, sorted by name.
+        """
+        stats = []
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            stats.append((name, histogram.count,
+                    histogram.percentile(50) / 1000.0,
+                    histogram.percentile(99) / 1000.0,
+                    histogram.max / 1000.0))
+        return stats
+
+
+    def report(self):
+        """
+        Return the statistics of every function, as lines of text.
+        """
+        lines = ["{0:<20} {1:>8} {2:>10} {3:>10} {4:>10}".format(
+                "function", "calls", "p50 us", "p99 us", "max us")]
+        for stat in self.stats():
+            lines.append("{0:<20} {1:>8d} {2:>10.1f} {3:>10.1f} {4:>10.1f}".format(*stat))
+        return lines
+
+
+def appendReport(fileName, lines):
+    """
+    Append a timestamped report to a log file.
+    """
+    with open(fileName, "a", encoding="utf-8") as fd:
+        fd.write(time.strftime("[%Y-%m-%d %H:%M:%S]\n"))
+        fd.write("\n".join(lines) + "\n\n")
@@ -0,0 +1,443 @@
+"""
+Run PartyLaps outside of the game, for benchmarks and tests.
+
+``FakeAC`` and ``FakeACSys`` stand in for the ``ac`` and ``acsys`` modules
+of the game: controls are kept in memory and every call is counted. A
+``Replay`` loads PartyLaps with them, in a directory of its own, and feeds
+it frames as fast as they come, from a telemetry file written by
+``TelemetryRecorder`` or from ``syntheticSession``. The shared memory pages
+are replaced by in-memory pages which each frame is copied into.
+"""
+import collections
+import ctypes
+import math
+import os
+import random
+import time
+
+import PartyLaps as PartyLapsModule
+from Profiler import Histogram
+from PartyLaps_lib.sim_info import info, BufferPages, AC_LIVE
+from PartyLaps_lib.sim_info import SPageFilePhysics, SPageFileGraphic
+from TelemetryRecorder import TelemetryRecord, readTelemetry
+
+
+class CS(object):
+    """
+    The car state identifiers of ``acsys.CS``.
+    """
+    LapTime = 0
+    LastLap = 1
+    BestLap = 2
+    LapCount = 3
+    NormalizedSplinePosition = 4
+    PerformanceMeter = 5
+
+
+class FakeACSys(object):
+    """
+    Stands in for the ``acsys`` module.
+    """
+    CS = CS
+
+
+class Control(object):
+    """
+    A window, label, button or text input created through ``FakeAC``.
+    """
+
+    __slots__ = ("kind", "window", "text", "title", "visible", "position", "size",
+            "fontSize", "fontColor", "alignment", "opacity", "border", "listeners")
+
+    def __init__(self, kind, window, text):
+        self.kind = kind
+        self.window = window
+        self.text = text
+        self.title = text
+        self.visible = 1
+        self.position = (0, 0)
+        self.size = (0, 0)
+        self.fontSize = 0
+        self.fontColor = (1, 1, 1, 1)
+        self.alignment = "left"
+        self.opacity = 1.0
+        self.border = 1
+        self.listeners = []
+
+
+class FakeAC(object):
+    """
+    Stands in for the ``ac`` module, with the car state of the frame being
+    replayed. ``calls`` counts the calls made to each function.
+    """
+
+    # The functions of ``ac`` used by PartyLaps, which are counted
+    API = ("newApp", "addLabel", "addButton", "addTextInput", "getText", "setText",
+            "setTitle", "setVisible", "setPosition", "setSize", "setFontSize",
+            "setFontColor", "setFontAlignment", "setIconPosition",
+            "setBackgroundOpacity", "drawBorder", "addOnClickedListener",
+            "addRenderCallback", "getTrackName", "getTrackConfiguration",
+            "getCarName", "getCarState", "isCarInPitline", "getLastSplits", "log")
+
+    def __init__(self, trackName="ks_vallelunga", trackConf="", carName="abarth500"):
+        self.trackName = trackName
+        self.trackConf = trackConf
+        self.carName = carName
+        self.controls = [None]
+        self.renderCallbacks = []
+        self.messages = []
+        self.frame = TelemetryRecord()
+        self.frame.lapTime = 0
+        self.frame.lapCount = 0
+        self.frame.bestLap = 0
+        self.frame.position = 0.0
+        self.frame.inPitLine = 0
+        self.lastLap = 0
+        self.lastSplits = []
+
+        self.calls = collections.Counter()
+        for name in self.API:
+            setattr(self, name, self._counted(name, getattr(self, name)))
+
+
+    def _counted(self, name, function):
+        calls = self.calls
+
+        def counted(*args):
+            calls[name] += 1
+            return function(*args)
+
+        return counted
+
+
+    def _add(self, kind, window, text):
+        self.controls.append(Control(kind, window, text))
+        return len(self.controls) - 1
+
+
+    def control(self, text):
+        """
+        Return the id of the first control showing ``text``, or -1.
+        """
+        for index, control in enumerate(self.controls):
+            if control is not None and control.text == text:
+                return index
+        return -1
+
+
+    def click(self, control):
+        """
+        Call the listeners of a button as if it had been clicked.
+        """
+        for listener in self.controls[control].listeners:
+            listener(0, 0)
+
+
+    def errors(self):
+        """
+        Return the error messages logged by PartyLaps.
+        """
+        return [message for message in self.messages if "Error" in message]
+
+
+    # The ``ac`` functions
+
+    def newApp(self, name):
+        return self._add("app", 0, name)
+
+
+    def addLabel(self, window, text):
+        return self._add("label", window, text)
+
+
+    def addButton(self, window, text):
+        return self._add("button", window, text)
+
+
+    def addTextInput(self, window, text):
+        return self._add("input", window, "")
+
+
+    def getText(self, control):
+        return self.controls[control].text
+
+
+    def setText(self, control, text):
+        self.controls[control].text = text
+
+
+    def setTitle(self, control, title):
+        self.controls[control].title = title
+
+
+    def setVisible(self, control, visible):
+        self.controls[control].visible = visible
+
+
+    def setPosition(self, control, x, y):
+        self.controls[control].position = (x, y)
+
+
+    def setSize(self, control, width, height):
+        self.controls[control].size = (width, height)
+
+
+    def setFontSize(self, control, size):
+        self.controls[control].fontSize = size
+
+
+    def setFontColor(self, control, r, g, b, a):
+        self.controls[control].fontColor = (r, g, b, a)
+
+
+    def setFontAlignment(self, control, alignment):
+        self.controls[control].alignment = alignment
+
+
+    def setIconPosition(self, control, x, y):
+        pass
+
+
+    def setBackgroundOpacity(self, control, opacity):
+        self.controls[control].opacity = opacity
+
+
+    def drawBorder(self, control, border):
+        self.controls[control].border = border
+
+
+    def addOnClickedListener(self, control, listener):
+        self.controls[control].listeners.append(listener)
+
+
+    def addRenderCallback(self, control, callback):
+        self.renderCallbacks.append(callback)
+
+
+    def getTrackName(self, car):
+        return self.trackName
+
+
+    def getTrackConfiguration(self, car):
+        return self.trackConf
+
+
+    def getCarName(self, car):
+        return self.carName
+
+
+    def getCarState(self, car, state):
+        frame = self.frame
+        if state == CS.LapTime:
+            return frame.lapTime
+        if state == CS.LapCount:
+            return frame.lapCount
+        if state == CS.NormalizedSplinePosition:
+            return frame.position
+        if state == CS.BestLap:
+            return frame.bestLap
+        if state == CS.LastLap:
+            return self.lastLap
+        return 0
+
+
+    def isCarInPitline(self, car):
+        return self.frame.inPitLine
+
+
+    def getLastSplits(self, car):
+        return list(self.lastSplits)
+
+
+    def log(self, message):
+        self.messages.append(message)
+
+
+def syntheticSession(hours=6.0, frameRate=60, lapTime=90000, stintLaps=15, seed=0):
+    """
+    Yield the frames of a session of ``hours`` at ``frameRate``, as
+    ``TelemetryRecord``. Lap times vary by a few percent, one lap in twenty
+    is invalidated and the car goes through the pit lane every
+    ``stintLaps`` laps, for a change of driver.
+
+    The same record and pages are updated for every frame, so frames must be
+    used before asking for the next one.
+    """
+    rng = random.Random(seed)
+    step = 1000.0 / frameRate
+    frames = int(hours * 3600 * frameRate)
+
+    record = TelemetryRecord()
+    record.physics = SPageFilePhysics()
+    record.graphics = SPageFileGraphic()
+    record.physics.gas = 1.0
+    record.graphics.status = AC_LIVE
+    record.bestLap = 0
+    record.lapCount = 0
+    record.inPitLine = 0
+
+    thisLap = lapTime
+    elapsed = 0.0
+    invalid = False
+    for frame in range(frames):
+        # A little faster and slower through the lap, always going forward
+        position = elapsed / thisLap + 0.01 * math.sin(2 * math.pi * elapsed / thisLap)
+        record.time = frame * step / 1000.0
+        record.lapTime = int(elapsed)
+        record.position = position
+        # In the pit lane at the end of a stint and the start of the next one
+        record.inPitLine = int(record.lapCount % stintLaps == stintLaps - 1 and position > 0.95
+                or record.lapCount % stintLaps == 0 and record.lapCount and position < 0.05)
+
+        physics = record.physics
+        physics.packetId = frame + 1
+        physics.numberOfTyresOut = 4 if invalid and 0.4 < position < 0.41 else 0
+        braking = 0.2 < position % 0.25 < 0.22
+        physics.brake = 1.0 if braking else 0.0
+        physics.gas = 0.0 if braking else 1.0
+        graphics = record.graphics
+        graphics.packetId = frame + 1
+        graphics.iCurrentTime = record.lapTime
+        graphics.completedLaps = record.lapCount
+        graphics.normalizedCarPosition = position
+        graphics.isInPit = record.inPitLine
+        yield record
+
+        elapsed += step
+        if elapsed >= thisLap:
+            lap = int(thisLap)
+            record.lapCount += 1
+            if not invalid and (record.bestLap == 0 or lap < record.bestLap):
+                record.bestLap = lap
+            graphics.iLastTime = lap
+            graphics.iBestTime = record.bestLap
+            elapsed -= thisLap
+            thisLap = lapTime * rng.uniform(0.98, 1.04)
+            invalid = rng.random() < 0.05
+
+
+def recordedSession(fileName):
+    """
+    Yield the frames of a telemetry file written by ``TelemetryRecorder``.
+    """
+    return readTelemetry(fileName)
+
+
+class Replay(object):
+    """
+    PartyLaps loaded with a ``FakeAC`` in ``directory``, fed one frame at a
+    time. The module globals of PartyLaps, the current directory and the
+    shared memory pages are restored by ``stop``.
+
+    ``settings`` are written to the config file before PartyLaps reads it.
+    The time spent in ``acUpdate`` and the render callbacks of each frame is
+    counted in ``ticks``, in nanoseconds. The driver is changed, by clicking
+    the driver cell, whenever the car enters the pit lane.
+    """
+
+    def __init__(self, directory, ac=None, settings=None):
+        self.directory = directory
+        self.ac = ac or FakeAC()
+        self.acsys = FakeACSys()
+        self.settings = settings or {}
+        self.ticks = Histogram()
+        self.frames = 0
+        self.lastTime = None
+        self.lapCount = 0
+        self.inPitLine = 0
+        self.savedGlobals = None
+        self.savedDirectory = None
+
+
+    def start(self):
+        """
+        Call ``acMain``, as the game does when loading the app.
+        """
+        self.savedDirectory = os.getcwd()
+        self.savedGlobals = dict(vars(PartyLapsModule))
+        os.chdir(self.directory)
+
+        configDir = os.path.join("apps", "python", "PartyLaps", "PartyLaps_config")
+        if not os.path.exists(configDir):
+            os.makedirs(configDir)
+        if self.settings:
+            with open(os.path.join(configDir, "config.ini"), "w") as fd:
+                fd.write("[SETTINGS]\n")
+                for name, value in sorted(self.settings.items()):
+                    fd.write("{0} = {1}\n".format(name, value))
+
+        info.configure(BufferPages())
+        PartyLapsModule.ac = self.ac
+        PartyLapsModule.acsys = self.acsys
+        PartyLapsModule.acMain(1.0)
+
+
+    def step(self, frame, deltaT=None):
+        """
+        Show ``frame``, a ``TelemetryRecord``, to PartyLaps and run a frame of
+        the game: ``acUpdate`` and the render callbacks.
+        """
+        if deltaT is None:
+            deltaT = frame.time - self.lastTime if self.lastTime is not None else 0
+        self.lastTime = frame.time
+
+        # Synthetic frames are the same record updated, so compare to copies
+        enteringPits = frame.inPitLine and not self.inPitLine
+        self.inPitLine = frame.inPitLine
+        if frame.lapCount != self.lapCount:
+            self.lapCount = frame.lapCount
+            self.ac.lastLap = frame.graphics.iLastTime
+            self.ac.lastSplits = [frame.graphics.iLastTime // 3] * 3
+        self.ac.frame = frame
+        ctypes.memmove(ctypes.addressof(info.physics), ctypes.addressof(frame.physics),
+                ctypes.sizeof(SPageFilePhysics))
+        ctypes.memmove(ctypes.addressof(info.graphics), ctypes.addressof(frame.graphics),
+                ctypes.sizeof(SPageFileGraphic))
+
+        # A click is handled by the game between frames, so it is not part
+        # of the frame's time
+        if enteringPits:
+            self.changeDriver()
+        start = time.perf_counter()
+        PartyLapsModule.acUpdate(deltaT)
+        for callback in self.ac.renderCallbacks:
+            callback(deltaT)
+        self.ticks.record(int((time.perf_counter() - start) * 1000000000))
+        self.frames += 1
+
+
+    def changeDriver(self):
+        """
+        Click the driver cell of the laps table.
+        """
+        for index, control in enumerate(self.ac.controls):
+            if control is not None and PartyLapsModule.onClickDriver in control.listeners:
+                self.ac.click(index)
+                return
+
+
+    def run(self, frames, limit=None):
+        """
+        Step through ``frames``, at most ``limit`` of them.
+        """
+        for index, frame in enumerate(frames):
+            if limit is not None and index >= limit:
+                break
+            self.step(frame)
+
+
+    def stop(self):
+        """
+        Call ``acShutdown``, as the game does when leaving the session, and
+        restore what ``start`` changed.
+        """
+        try:
+            PartyLapsModule.acShutdown()
+        finally:
+            info.close()
+            module = vars(PartyLapsModule)
+            for name in list(module):
+                if name not in self.savedGlobals:
+                    del module[name]
+            module.update(self.savedGlobals)
+            os.chdir(self.savedDirectory)
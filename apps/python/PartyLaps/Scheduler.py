@@ -0,0 +1,80 @@
+"""
+A frame scheduler, to spread the work of ``acUpdate`` over frames.
+"""
+import time
+
+
+class Task(object):
+    """
+    A function run by the ``Scheduler``, and what it cost last time.
+    """
+
+    __slots__ = ("name", "function", "interval", "budget", "elapsed", "cost", "deferrals")
+
+    def __init__(self, name, function, interval, budget):
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.budget = budget
+        self.elapsed = 0
+        self.cost = 0
+        self.deferrals = 0
+
+
+class Scheduler(object):
+    """
+    Run tasks in tiers, in the order they were added, each at its own
+    interval.
+
+    Tasks with a budget, in microseconds, are deferred to a later frame when
+    the frame has already used too much of ``frameBudget`` to fit them, going
+    by the larger of their budget and what they cost the last time they ran.
+    A task is never deferred more than ``maxDeferrals`` frames in a row, and
+    tasks without a budget always run when due.
+    """
+
+    def __init__(self, frameBudget=2000, maxDeferrals=10, clock=time.perf_counter):
+        self.frameBudget = frameBudget
+        self.maxDeferrals = maxDeferrals
+        self.clock = clock
+        self.tasks = []
+
+
+    def add(self, name, function, interval=0, budget=0):
+        """
+        Add a task calling ``function(elapsed)`` with the seconds elapsed
+        since its last run. ``interval`` is the seconds between runs, or a
+        function returning them, 0 to run on every frame.
+        """
+        task = Task(name, function, interval, budget)
+        self.tasks.append(task)
+        return task
+
+
+    def tick(self, deltaT):
+        """
+        Run the tasks which are due, ``deltaT`` seconds after the last tick.
+        """
+        clock = self.clock
+        start = clock()
+        for task in self.tasks:
+            task.elapsed += deltaT
+            interval = task.interval
+            if callable(interval):
+                interval = interval()
+            if task.elapsed < interval:
+                continue
+
+            if task.budget and task.deferrals < self.maxDeferrals:
+                used = (clock() - start) * 1000000
+                if used + max(task.budget, task.cost) > self.frameBudget:
+                    task.deferrals += 1
+                    continue
+
+            taskStart = clock()
+            try:
+                task.function(task.elapsed)
+            finally:
+                task.cost = (clock() - taskStart) * 1000000
+                task.elapsed = 0
+                task.deferrals = 0
@@ -0,0 +1,96 @@
+# python SessionLog.py "PartyLaps_session/<track> - <car> - <date>.log" > sessions.ini
+"""
+An append-only log of the sessions driven in a day.
+
+Each session is a single line of JSON, so writing one costs only the size of
+that session no matter how many were already logged. The log can be
+rendered to the ini layout of the session files written by earlier versions
+with ``renderSessions``, or from the command line.
+"""
+import configparser
+import json
+import os
+import sys
+
+from TimeFormat import timeToString
+
+
+def appendSession(fileName, session):
+    """
+    Append a session to the log. ``session`` is a dictionary with the
+    "laps", "reference", "referenceTime", "best" and "total" keys.
+    """
+    record = {
+        "laps": list(session["laps"]),
+        "reference": session["reference"],
+        "referenceTime": session["referenceTime"],
+        "best": session["best"],
+        "total": session["total"],
+    }
+    line = json.dumps(record, sort_keys=True) + "\n"
+    with open(fileName, "a+b") as fd:
+        # Start on a new line if a crash left the last record incomplete, so
+        # this one is not lost with it
+        fd.seek(0, os.SEEK_END)
+        if fd.tell():
+            fd.seek(-1, os.SEEK_END)
+            if fd.read(1) != b"\n":
+                line = "\n" + line
+        fd.write(line.encode("utf-8"))
+
+
+def readSessions(fileName):
+    """
+    Return the list of sessions in the log. A line which cannot be parsed,
+    such as one left incomplete by a crash, is skipped.
+    """
+    sessions = []
+    with open(fileName, encoding="utf-8") as fd:
+        for line in fd:
+            try:
+                sessions.append(json.loads(line))
+            except ValueError:
+                continue
+    return sessions
+
+
+def renderSessions(sessions):
+    """
+    Return a ConfigParser with one "Session N" section per session, in the
+    layout of the session ini files.
+    """
+    lapsLog = configparser.ConfigParser()
+    for number, session in enumerate(sessions, 1):
+        sectionName = "Session {0}".format(number)
+        lapsLog.add_section(sectionName)
+
+        laps = session["laps"]
+        for index in range(len(laps)):
+            lapsLog.set(sectionName, "Lap {0}".format(index+1), timeToString(laps[index]))
+
+        if session["reference"] != "best":
+            lapsLog.set(sectionName, session["reference"].title(),
+                    timeToString(session["referenceTime"]))
+
+        lapsLog.set(sectionName, "Best", timeToString(session["best"]))
+        lapsLog.set(sectionName, "Total", timeToString(session["total"]))
+
+    return lapsLog
+
+
+def main(argv):
+    if len(argv) not in (2, 3):
+        sys.stderr.write("Usage: {0} <session log> [<ini file>]\n".format(argv[0]))
+        return 1
+
+    lapsLog = renderSessions(readSessions(argv[1]))
+    if len(argv) == 3:
+        with open(argv[2], "w", encoding="utf-8") as fd:
+            lapsLog.write(fd)
+    else:
+        lapsLog.write(sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
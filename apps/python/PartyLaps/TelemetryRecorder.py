@@ -0,0 +1,286 @@
+# python TelemetryRecorder.py "PartyLaps_session/<track> [<layout>] - <car> - <date>.telemetry"
+"""
+A recorder of the telemetry PartyLaps reads, for offline analysis and for
+replaying sessions in benchmarks.
+
+Every frame on which the game produced a new physics or graphics packet is
+recorded: the car state read through ``ac`` followed by copies of both
+pages. Records are packed into a preallocated ring buffer on the game thread
+and written out in blocks by the background writer. A file is::
+
+    magic          4 bytes   b"PLTM"
+    version        uint16    2
+    wcharSize      uint16    size of a c_wchar where it was recorded
+    physicsSize    uint32    size of the physics page
+    graphicsSize   uint32    size of the graphics page
+    track          name      ac.getTrackName
+    trackConf      name      ac.getTrackConfiguration, the layout
+    car            name      ac.getCarName
+    records
+
+where a name is its uint16 length in bytes followed by its UTF-8 encoding
+(version 1 files have no names), and each record, little-endian::
+
+    time           double    seconds since the start of the recording
+    lapTime        int32     CS.LapTime
+    lapCount       int32     CS.LapCount
+    bestLap        int32     CS.BestLap
+    position       float32   CS.NormalizedSplinePosition
+    inPitLine      int32     isCarInPitline
+    physics page
+    graphics page
+"""
+import ctypes
+import struct
+import sys
+import threading
+import time
+
+from PartyLaps_lib.sim_info import SPageFilePhysics, SPageFileGraphic
+
+TELEMETRY_MAGIC = b"PLTM"
+TELEMETRY_VERSION = 2
+
+_fileHeader = struct.Struct("<4sHHII")
+_nameLength = struct.Struct("<H")
+_carState = struct.Struct("<diiifi")
+
+_physicsSize = ctypes.sizeof(SPageFilePhysics)
+_graphicsSize = ctypes.sizeof(SPageFileGraphic)
+RECORD_SIZE = _carState.size + _physicsSize + _graphicsSize
+
+
+class TelemetryRecorder(object):
+    """
+    Record telemetry to a file through a ``BackgroundWriter``.
+
+    The ring buffer holds ``capacity`` records and is written out every
+    ``blockRecords`` records. If the writer falls so far behind that the ring
+    is full, new records are dropped and counted in ``dropped`` rather than
+    making the game wait.
+    """
+
+    def __init__(self, fileName, writer, capacity=4096, blockRecords=512, clock=time.perf_counter,
+            track="", trackConf="", car=""):
+        self.fileName = fileName
+        self.writer = writer
+        self.capacity = capacity
+        self.blockRecords = blockRecords
+        self.clock = clock
+        self.start = clock()
+
+        self.buffer = bytearray(capacity * RECORD_SIZE)
+        self.bufferView = (ctypes.c_char * len(self.buffer)).from_buffer(self.buffer)
+        self.address = ctypes.addressof(self.bufferView)
+        # Records produced by the game thread and written by the writer
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.lastPacketIds = None
+
+        self.lock = threading.Lock()
+        self.flushQueued = False
+
+        with open(fileName, "wb") as fd:
+            fd.write(_fileHeader.pack(TELEMETRY_MAGIC, TELEMETRY_VERSION,
+                    ctypes.sizeof(ctypes.c_wchar), _physicsSize, _graphicsSize))
+            for name in (track, trackConf, car):
+                name = name.encode("utf-8")
+                fd.write(_nameLength.pack(len(name)))
+                fd.write(name)
+
+
+    def isNewPacket(self, snapshot):
+        """
+        Return whether ``snapshot`` holds packets which were not recorded yet.
+        """
+        return (snapshot.physics.packetId, snapshot.graphics.packetId) != self.lastPacketIds
+
+
+    def record(self, snapshot, lapTime, lapCount, bestLap, position, inPitLine):
+        """
+        Record the car state and the pages of a ``SimSnapshot``.
+        """
+        self.lastPacketIds = (snapshot.physics.packetId, snapshot.graphics.packetId)
+        if self.head - self.tail >= self.capacity:
+            self.dropped += 1
+            return
+
+        offset = (self.head % self.capacity) * RECORD_SIZE
+        _carState.pack_into(self.buffer, offset, self.clock() - self.start,
+                lapTime, lapCount, bestLap, position, inPitLine)
+        offset += _carState.size
+        ctypes.memmove(self.address + offset, ctypes.addressof(snapshot.physics), _physicsSize)
+        offset += _physicsSize
+        ctypes.memmove(self.address + offset, ctypes.addressof(snapshot.graphics), _graphicsSize)
+        self.head += 1
+
+        if self.head % self.blockRecords == 0:
+            self.queueFlush()
+
+
+    def queueFlush(self):
+        """
+        Queue the records not written yet to be written by the writer.
+        """
+        with self.lock:
+            if self.flushQueued:
+                return
+            self.flushQueued = True
+        if not self.writer.submit(self.flush):
+            with self.lock:
+                self.flushQueued = False
+
+
+    def flush(self):
+        """
+        Append the records not written yet to the file. This runs on the
+        writer thread.
+        """
+        with self.lock:
+            self.flushQueued = False
+        head = self.head
+        if head == self.tail:
+            return
+
+        view = memoryview(self.buffer)
+        with open(self.fileName, "ab") as fd:
+            while self.tail < head:
+                start = self.tail % self.capacity
+                end = min(self.capacity, start + head - self.tail)
+                fd.write(view[start * RECORD_SIZE:end * RECORD_SIZE])
+                self.tail += end - start
+
+
+class TelemetryRecord(object):
+    """
+    A record read back from a telemetry file.
+    """
+
+    __slots__ = ("time", "lapTime", "lapCount", "bestLap", "position", "inPitLine",
+            "physics", "graphics")
+
+
+def _recordedPage(page, wcharSize):
+    """
+    Return the layout of ``page`` where a c_wchar is ``wcharSize`` bytes,
+    with its text fields as arrays of code units.
+    """
+    codeUnit = {2: ctypes.c_uint16, 4: ctypes.c_uint32}[wcharSize]
+    fields = []
+    for name, fieldType in page._fields_:
+        if getattr(fieldType, "_type_", None) is ctypes.c_wchar:
+            fieldType = codeUnit * fieldType._length_
+        fields.append((name, fieldType))
+    return type("Recorded" + page.__name__, (ctypes.Structure,),
+            {"_pack_": page._pack_, "_fields_": fields})
+
+
+def _pageReader(page, wcharSize):
+    """
+    Return a function building a ``page`` structure from the bytes of a page
+    recorded where a c_wchar is ``wcharSize`` bytes. Recordings from another
+    platform, such as Windows recordings read on Linux, are converted field
+    by field.
+    """
+    if wcharSize == ctypes.sizeof(ctypes.c_wchar):
+        return page.from_buffer_copy
+
+    recorded = _recordedPage(page, wcharSize)
+
+    def read(data):
+        source = recorded.from_buffer_copy(data)
+        result = page()
+        for name, fieldType in page._fields_:
+            value = getattr(source, name)
+            if getattr(fieldType, "_type_", None) is ctypes.c_wchar:
+                value = "".join(map(chr, value)).split("\0", 1)[0]
+            elif isinstance(value, ctypes.Array):
+                value = fieldType(*value)
+            setattr(result, name, value)
+        return result
+
+    return read
+
+
+def _readExactly(fd, size):
+    data = fd.read(size)
+    if len(data) < size:
+        raise ValueError("Truncated telemetry header")
+    return data
+
+
+def _readHeader(fd):
+    """
+    Read the header of a telemetry file and return its page sizes and the
+    track, layout and car names.
+    """
+    magic, version, wcharSize, physicsSize, graphicsSize = _fileHeader.unpack(
+            _readExactly(fd, _fileHeader.size))
+    if magic != TELEMETRY_MAGIC:
+        raise ValueError("Not a telemetry file")
+    if version not in (1, TELEMETRY_VERSION):
+        raise ValueError("Unsupported telemetry version: %d" % version)
+
+    names = ["", "", ""]
+    if version > 1:
+        for index in range(len(names)):
+            length, = _nameLength.unpack(_readExactly(fd, _nameLength.size))
+            names[index] = _readExactly(fd, length).decode("utf-8")
+    return wcharSize, physicsSize, graphicsSize, tuple(names)
+
+
+def readTelemetryTrack(fileName):
+    """
+    Return the track, layout and car names a telemetry file was recorded
+    with, which are empty for files recorded before they were kept.
+    """
+    with open(fileName, "rb") as fd:
+        return _readHeader(fd)[3]
+
+
+def readTelemetry(fileName):
+    """
+    Yield the ``TelemetryRecord`` of a telemetry file, stopping at a
+    truncated record.
+    """
+    with open(fileName, "rb") as fd:
+        wcharSize, physicsSize, graphicsSize, names = _readHeader(fd)
+
+        readPhysics = _pageReader(SPageFilePhysics, wcharSize)
+        readGraphics = _pageReader(SPageFileGraphic, wcharSize)
+        recordSize = _carState.size + physicsSize + graphicsSize
+
+        while True:
+            data = fd.read(recordSize)
+            if len(data) < recordSize:
+                return
+            record = TelemetryRecord()
+            (record.time, record.lapTime, record.lapCount, record.bestLap,
+                    record.position, record.inPitLine) = _carState.unpack_from(data)
+            start = _carState.size
+            record.physics = readPhysics(data[start:start + physicsSize])
+            start += physicsSize
+            record.graphics = readGraphics(data[start:start + graphicsSize])
+            yield record
+
+
+def main(argv):
+    if len(argv) != 2:
+        sys.stderr.write("Usage: {0} <telemetry file>\n".format(argv[0]))
+        return 1
+
+    print("{0} [{1}] - {2}".format(*readTelemetryTrack(argv[1])))
+    count = 0
+    for record in readTelemetry(argv[1]):
+        if count % 100 == 0:
+            print("{0:10.3f} s  lap {1:3d}  {2:8d} ms  position {3:.4f}  packet {4}".format(
+                    record.time, record.lapCount, record.lapTime, record.position,
+                    record.physics.packetId))
+        count += 1
+    print("{0} records".format(count))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,31 @@
+"""
+Formatting of lap times and deltas for display.
+
+Both functions are called for several labels on every refresh, so they use
+``%`` formatting, which is cheaper than ``str.format``. The deltas and the
+projected lap time are floats which change on every refresh, and ACTable
+already skips the lap rows whose text is unchanged, so nothing is cached.
+"""
+
+
+def timeToString(time):
+    """
+    Format a time in milliseconds as "m:ss.mmm", or "-:--.---" if it is not
+    a positive time.
+    """
+    try:
+        if time <= 0:
+            return "-:--.---"
+        return "%d:%02d.%03d" % (int(time/60000), int((time%60000)/1000), int(time%1000))
+    except Exception:
+        return "-:--.---"
+
+
+def deltaToString(time):
+    """
+    Format a delta in milliseconds as signed seconds, "+s.mmm".
+    """
+    try:
+        return "%+.3f" % (float(time)/1000)
+    except Exception:
+        return "+0.000"
@@ -0,0 +1,67 @@
+# python bench_LapTrace.py
+"""
+Benchmarks for the size and load time of lap traces, using a trace the size
+of a Nordschleife lap.
+"""
+import os
+import random
+import tempfile
+import timeit
+
+from LapTrace import LapTrace, readTraceFile, writeTraceFile
+
+SAMPLES = 20000
+LAP_TIME = 7 * 60000
+
+
+def nordschleifeTrace(count=SAMPLES, lapTime=LAP_TIME, seed=1):
+    """
+    Return a trace of ``count`` samples, with positions as the game reports
+    them (single precision).
+    """
+    rng = random.Random(seed)
+    trace = LapTrace([(0.0, 0)])
+    step = 1.0 / count
+    for index in range(1, count - 1):
+        position = index * step + rng.uniform(0, step / 2)
+        trace.append(position, int(position * lapTime * rng.uniform(0.98, 1.02)))
+    trace.append(1.0, lapTime)
+    # Round the positions through the binary format to get float32 values.
+    return LapTrace.fromBytes(trace.toBytes())
+
+
+def report(name, seconds, size):
+    print("{0:<28} {1:>9.3f} ms {2:>10d} bytes".format(name, seconds * 1000, size))
+
+
+def bench(function, number=10):
+    return min(timeit.repeat(function, number=1, repeat=number))
+
+
+def main():
+    trace = nordschleifeTrace()
+    text = str(list(trace))
+
+    fd, fileName = tempfile.mkstemp(".trace")
+    os.close(fd)
+    fd, compressedFileName = tempfile.mkstemp(".trace")
+    os.close(fd)
+    try:
+        writeTraceFile(fileName, trace)
+        writeTraceFile(compressedFileName, trace, compress=True)
+
+        print("Loading a {0} sample trace:".format(len(trace)))
+        report("eval(str(list))", bench(lambda: eval(text)), len(text))
+        report("LapTrace.loads", bench(lambda: LapTrace.loads(text)), len(text))
+        report("readTraceFile", bench(lambda: readTraceFile(fileName)),
+                os.path.getsize(fileName))
+        report("readTraceFile (compressed)",
+                bench(lambda: readTraceFile(compressedFileName)),
+                os.path.getsize(compressedFileName))
+    finally:
+        os.remove(fileName)
+        os.remove(compressedFileName)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# python bench_PartyLaps.py [hours | telemetry file]
+"""
+Benchmark of a whole session replayed through PartyLaps, by default a six
+hour party session of 90 s laps at 60 frames per second, or the frames of a
+telemetry file.
+
+Reports the time spent per frame, the ``ac`` calls made per frame and the
+memory allocated by Python as the session goes on.
+"""
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 3.3, as shipped with the game
+    tracemalloc = None
+
+from Replay import Replay, syntheticSession, recordedSession
+
+FRAME_RATE = 60
+SETTINGS = {
+    "driversListText": "Alice, Bob, Carol, Dave",
+    "logBest": "always",
+}
+
+
+def memory():
+    if tracemalloc is None:
+        return 0
+    return tracemalloc.get_traced_memory()[0]
+
+
+def main(argv):
+    hours = 6.0
+    frames = None
+    if len(argv) > 1:
+        try:
+            hours = float(argv[1])
+        except ValueError:
+            frames = recordedSession(argv[1])
+    if frames is None:
+        frames = syntheticSession(hours, FRAME_RATE)
+
+    directory = tempfile.mkdtemp()
+    replay = Replay(directory, settings=SETTINGS)
+    if tracemalloc is not None:
+        tracemalloc.start()
+    try:
+        replay.start()
+        startMemory = memory()
+        print("{0:>8} {1:>10} {2:>10} {3:>10} {4:>12}".format(
+                "hour", "frames", "p50 us", "p99 us", "memory kB"))
+
+        start = time.perf_counter()
+        lastHour = 0
+        for frame in frames:
+            replay.step(frame)
+            if int(frame.time / 3600) > lastHour:
+                lastHour = int(frame.time / 3600)
+                print("{0:>8d} {1:>10d} {2:>10.1f} {3:>10.1f} {4:>12.1f}".format(
+                        lastHour, replay.frames, replay.ticks.percentile(50) / 1000.0,
+                        replay.ticks.percentile(99) / 1000.0,
+                        (memory() - startMemory) / 1024.0))
+        elapsed = time.perf_counter() - start
+        endMemory = memory()
+        replay.stop()
+    finally:
+        if tracemalloc is not None:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    count = max(replay.frames, 1)
+    print("")
+    print("{0} frames in {1:.1f} s, {2:.0f} frames/s".format(
+            replay.frames, elapsed, replay.frames / elapsed))
+    print("per frame: p50 {0:.1f} us, p99 {1:.1f} us, max {2:.1f} us".format(
+            replay.ticks.percentile(50) / 1000.0, replay.ticks.percentile(99) / 1000.0,
+            replay.ticks.max / 1000.0))
+    if tracemalloc is not None:
+        print("memory: {0:.1f} kB grown over the session, {1:.1f} kB peak".format(
+                (endMemory - startMemory) / 1024.0, peak / 1024.0))
+
+    print("")
+    print("{0:<24} {1:>10} {2:>10}".format("ac call", "calls", "per frame"))
+    for name, calls in sorted(replay.ac.calls.items(), key=lambda item: -item[1]):
+        print("{0:<24} {1:>10d} {2:>10.3f}".format(name, calls, float(calls) / count))
+
+    for message in replay.ac.errors():
+        print(message)
+    return 1 if replay.ac.errors() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
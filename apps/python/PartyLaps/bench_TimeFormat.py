@@ -0,0 +1,67 @@
+# python bench_TimeFormat.py
+"""
+Benchmarks for the per-call cost of formatting times and deltas, against the
+``str.format`` based functions they replace, with the values the frame loop
+passes them.
+"""
+import random
+import timeit
+
+from TimeFormat import timeToString, deltaToString
+
+CALLS = 100000
+
+
+def legacyTimeToString(time):
+    try:
+        if time <= 0:
+            return "-:--.---"
+        else:
+            return "{:d}:{:0>2d}.{:0>3d}".format(int(time/60000), int((time%60000)/1000), int(time%1000))
+    except Exception:
+        return "-:--.---"
+
+
+def legacyDeltaToString(time):
+    try:
+        return "{:+.3f}".format(float(time)/1000)
+    except Exception:
+        return "+0.000"
+
+
+def report(name, seconds):
+    print("{0:<38} {1:>8.3f} us/call".format(name, seconds * 1e6 / CALLS))
+
+
+def bench(function, values):
+    def run():
+        for value in values:
+            function(value)
+    return min(timeit.repeat(run, number=1, repeat=5))
+
+
+def main():
+    rng = random.Random(1)
+    # The lap rows: the same few integer lap times over and over
+    laps = [rng.randint(90000, 95000) for index in range(20)] * (CALLS // 20)
+    # The current lap time, an integer from the game
+    times = [index * 16 for index in range(CALLS)]
+    # The deltas of the current lap, floats interpolated by calculateDelta
+    deltas = [rng.uniform(-2000, 2000) for index in range(CALLS)]
+    # The projected lap time, the best lap plus a delta
+    projections = [92000 + delta for delta in deltas]
+
+    for name, function, values in [
+            ("timeToString, lap rows", timeToString, laps),
+            ("timeToString, running time", timeToString, times),
+            ("timeToString, projection", timeToString, projections),
+            ("deltaToString, lap rows", deltaToString, [lap - 92000 for lap in laps]),
+            ("deltaToString, current lap", deltaToString, deltas),
+            ]:
+        legacy = legacyTimeToString if function is timeToString else legacyDeltaToString
+        report(name + " (before)", bench(legacy, values))
+        report(name + " (after)", bench(function, values))
+
+
+if __name__ == "__main__":
+    main()
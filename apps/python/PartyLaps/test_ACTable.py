@@ -2,6 +2,7 @@
 
 import unittest
 from ACTable import ACTable
+from Replay import FakeAC
 
 class TestCellPositions(unittest.TestCase):
     """
@@ -50,3 +51,138 @@ class TestCellPositions(unittest.TestCase):
         result = self.table._cellPosition(0, 2)
         expected = (5, 5 + 18 + 3 + 18 + 3)
         self.assertEqual(result, expected)
+
+
+class TestRedundantCalls(unittest.TestCase):
+    """
+    Tests for skipping calls which would not change a cell.
+    """
+
+    def setUp(self):
+        self.ac = FakeAC()
+        self.table = ACTable(self.ac, 0)
+        self.table.setSize(2, 2)
+        self.table.setColumnWidths(5, 5)
+        self.table.setColumnAlignments("left", "right")
+        self.table.setFontSize(18)
+        self.table.draw()
+        self.ac.calls.clear()
+
+
+    def test_sameText(self):
+        self.table.setCellValue("1:00.000", 1, 1)
+        self.table.setCellValue("1:00.000", 1, 1)
+        self.assertEqual(self.ac.calls, {"setText": 1})
+        self.assertEqual(self.ac.controls[self.table.getCellLabel(1, 1)].text, "1:00.000")
+        self.assertEqual((self.table.callsIssued, self.table.callsSuppressed), (1, 1))
+
+
+    def test_differentText(self):
+        self.table.setCellValue("1:00.000", 1, 1)
+        self.table.setCellValue("1:00.001", 1, 1)
+        self.table.setCellValue("1:00.001", 0, 1)
+        self.assertEqual(self.ac.calls, {"setText": 3})
+        self.assertEqual(self.table.callsSuppressed, 0)
+
+
+    def test_sameColor(self):
+        self.table.setFontColor(1, 0, 0, 1, 1, 1)
+        self.table.setFontColor(1, 0, 0, 1, 1, 1)
+        self.table.setFontColor(0, 1, 0, 1, 1, 1)
+        self.assertEqual(self.ac.calls, {"setFontColor": 2})
+        self.assertEqual(self.ac.controls[self.table.getCellLabel(1, 1)].fontColor, (0, 1, 0, 1))
+        self.assertEqual((self.table.callsIssued, self.table.callsSuppressed), (2, 1))
+
+
+    def test_redrawForgets(self):
+        """
+        After a redraw the text is sent again.
+        """
+        self.table.setCellValue("Driver:", 0, 0)
+        self.table.draw()
+        self.ac.calls.clear()
+        self.table.setCellValue("Driver:", 0, 0)
+        self.assertEqual(self.ac.calls, {"setText": 1})
+
+
+    def test_resetCallCounts(self):
+        self.table.setCellValue("Driver:", 0, 0)
+        self.table.resetCallCounts()
+        self.assertEqual((self.table.callsIssued, self.table.callsSuppressed), (0, 0))
+
+
+class TestLabelPool(unittest.TestCase):
+    """
+    Tests for reusing labels when the table is redrawn.
+    """
+
+    def setUp(self):
+        self.ac = FakeAC()
+        self.table = ACTable(self.ac, 0)
+        self.table.setFontSize(18)
+
+    def draw(self, nColumns, nRows):
+        self.table.setSize(nColumns, nRows)
+        self.table.setColumnWidths(*([5] * nColumns))
+        self.table.setColumnAlignments(*(["left"] * nColumns))
+        self.table.draw()
+
+    def control(self, iX, iY):
+        return self.ac.controls[self.table.getCellLabel(iX, iY)]
+
+
+    def test_redrawReusesLabels(self):
+        self.draw(3, 4)
+        labels = dict(self.table.cells)
+        for fontSize in range(10, 30):
+            self.table.setFontSize(fontSize)
+            self.draw(3, 4)
+        self.assertEqual(self.ac.calls["addLabel"], 12)
+        self.assertEqual(self.table.cells, labels)
+
+
+    def test_growAllocatesNewCells(self):
+        self.draw(3, 4)
+        self.draw(3, 6)
+        self.assertEqual(self.ac.calls["addLabel"], 18)
+
+
+    def test_shrinkHides(self):
+        """
+        Cells which are no longer in the table are hidden once, and shown
+        again when the table grows back.
+        """
+        self.draw(3, 4)
+        hidden = self.ac.controls[self.table.getCellLabel(2, 3)]
+        self.draw(3, 3)
+        self.assertEqual(hidden.visible, 0)
+        self.ac.calls.clear()
+        self.draw(3, 3)
+        self.assertEqual(self.ac.calls["setVisible"], 0)
+        self.assertRaises(ValueError, self.table.getCellLabel, 2, 3)
+
+        self.draw(3, 4)
+        self.assertEqual(hidden.visible, 1)
+        self.assertEqual(self.ac.calls["addLabel"], 0)
+
+
+    def test_redrawClears(self):
+        """
+        A reused label is blank and white, like a new one.
+        """
+        self.draw(2, 2)
+        self.table.setCellValue("Tot.", 0, 1)
+        self.table.setFontColor(1, 0, 0, 1, 0, 1)
+        self.draw(2, 2)
+        self.assertEqual(self.control(0, 1).text, "")
+        self.assertEqual(self.control(0, 1).fontColor, (1, 1, 1, 1))
+
+
+    def test_listenerAddedOnce(self):
+        callback = lambda *args: None
+        self.draw(2, 2)
+        self.table.addOnClickedListener(0, 0, callback)
+        self.draw(2, 3)
+        self.table.addOnClickedListener(0, 0, callback)
+        self.assertEqual(self.ac.calls["addOnClickedListener"], 1)
+        self.assertEqual(self.control(0, 0).listeners, [callback])
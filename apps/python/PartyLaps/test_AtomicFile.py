@@ -0,0 +1,44 @@
+# python -m unittest test_AtomicFile
+
+import os
+import unittest
+import tempfile
+from AtomicFile import atomicWrite
+
+class TestAtomicWrite(unittest.TestCase):
+    """
+    Tests for ``atomicWrite``.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, "file.ini")
+
+
+    def tearDown(self):
+        for fileName in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, fileName))
+        os.rmdir(self.directory)
+
+
+    def test_text(self):
+        atomicWrite(self.fileName, "[TIME]\n")
+        with open(self.fileName) as fd:
+            self.assertEqual(fd.read(), "[TIME]\n")
+
+
+    def test_bytes(self):
+        atomicWrite(self.fileName, b"\x00\x01")
+        with open(self.fileName, "rb") as fd:
+            self.assertEqual(fd.read(), b"\x00\x01")
+
+
+    def test_replace(self):
+        """
+        An existing file is replaced, and no temporary file is left behind.
+        """
+        atomicWrite(self.fileName, "old")
+        atomicWrite(self.fileName, "new")
+        with open(self.fileName) as fd:
+            self.assertEqual(fd.read(), "new")
+        self.assertEqual(os.listdir(self.directory), ["file.ini"])
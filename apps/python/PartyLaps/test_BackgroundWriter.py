@@ -0,0 +1,107 @@
+# python -m unittest test_BackgroundWriter
+
+import threading
+import unittest
+from BackgroundWriter import BackgroundWriter
+
+class TestBackgroundWriter(unittest.TestCase):
+    """
+    Tests for ``BackgroundWriter``.
+    """
+
+    def setUp(self):
+        self.logged = []
+        self.writer = BackgroundWriter(self.logged.append)
+
+
+    def tearDown(self):
+        self.writer.close()
+
+
+    def test_synchronousBeforeStart(self):
+        """
+        Jobs run immediately on the calling thread until the writer has been
+        started.
+        """
+        threads = []
+        self.writer.submit(lambda: threads.append(threading.current_thread()))
+        self.assertEqual(threads, [threading.current_thread()])
+
+
+    def test_runsInOrderOnThread(self):
+        results = []
+        threads = set()
+        def job(value):
+            threads.add(threading.current_thread())
+            results.append(value)
+
+        self.writer.start()
+        for value in range(20):
+            self.writer.submit(job, value)
+        self.writer.flush()
+
+        self.assertEqual(results, list(range(20)))
+        self.assertNotIn(threading.current_thread(), threads)
+
+
+    def test_closeFlushes(self):
+        """
+        Closing the writer runs every job which was queued.
+        """
+        results = []
+        release = threading.Event()
+        self.writer.start()
+        self.writer.submit(release.wait)
+        for value in range(5):
+            self.writer.submit(results.append, value)
+        release.set()
+        self.writer.close()
+
+        self.assertEqual(results, list(range(5)))
+        self.assertIsNone(self.writer.thread)
+
+
+    def test_errorsAreLogged(self):
+        """
+        A failing job is logged and does not stop the following ones.
+        """
+        results = []
+        def fail():
+            raise IOError("disk full")
+
+        self.writer.start()
+        self.writer.submit(fail)
+        self.writer.submit(results.append, 1)
+        self.writer.flush()
+
+        self.assertEqual(results, [1])
+        self.assertIn("disk full", self.logged[0])
+
+
+    def test_dropsWhenFull(self):
+        """
+        Submitting to a full queue drops the job instead of waiting.
+        """
+        results = []
+        running = threading.Event()
+        release = threading.Event()
+        def block():
+            running.set()
+            release.wait()
+
+        self.writer = BackgroundWriter(self.logged.append, maxJobs=2)
+        self.writer.start()
+        self.writer.submit(block)
+        running.wait()
+        # The first job is running, two more fill the queue
+        self.assertTrue(self.writer.submit(results.append, 1))
+        self.assertTrue(self.writer.submit(results.append, 2))
+        self.assertFalse(self.writer.submit(results.append, 3))
+        self.assertFalse(self.writer.submit(results.append, 4))
+        release.set()
+        self.writer.close()
+
+        self.assertEqual(results, [1, 2])
+        self.assertEqual(self.writer.dropped, 2)
+        self.assertEqual(len([message for message in self.logged if "queue full" in message]), 1)
+        self.assertIn("PartyLaps: Background writer dropped 2 jobs", self.logged)
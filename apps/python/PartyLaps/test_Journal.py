@@ -0,0 +1,136 @@
+# python -m unittest test_Journal
+
+import os
+import unittest
+import tempfile
+from BackgroundWriter import BackgroundWriter
+from Journal import Journal, RECORD_LAP, RECORD_BEST_LAP, RECORD_PERSONAL_BEST, RECORD_SESSION_END
+from LapTrace import LapTrace
+
+class TestJournal(unittest.TestCase):
+    """
+    Tests for ``Journal``.
+    """
+
+    trace = LapTrace([(0.0, 0), (0.5, 30000), (1.0, 61000)])
+
+    def setUp(self):
+        fd, self.fileName = tempfile.mkstemp(".journal")
+        os.close(fd)
+        os.remove(self.fileName)
+        self.journal = Journal(self.fileName, BackgroundWriter())
+
+
+    def tearDown(self):
+        if os.path.exists(self.fileName):
+            os.remove(self.fileName)
+
+
+    def test_replayEmpty(self):
+        self.assertEqual(self.journal.replay(), [])
+
+
+    def test_replay(self):
+        self.journal.recordLap("alpha", 61000)
+        self.journal.recordBestLap("alpha", 61000, self.trace)
+        self.journal.recordPersonalBest("bêta", 62000, self.trace)
+        self.journal.recordSessionEnd()
+
+        records = self.journal.replay()
+
+        self.assertEqual([record.type for record in records],
+                [RECORD_LAP, RECORD_BEST_LAP, RECORD_PERSONAL_BEST, RECORD_SESSION_END])
+        self.assertEqual((records[0].driver, records[0].time), ("alpha", 61000))
+        self.assertEqual(records[2].driver, "bêta")
+        self.assertEqual(records[2].time, 62000)
+        self.assertEqual(records[2].trace, self.trace)
+
+
+    def test_replayTruncated(self):
+        """
+        A record cut short by a crash, and everything after it, is dropped.
+        """
+        self.journal.recordLap("alpha", 61000)
+        self.journal.recordPersonalBest("alpha", 61000, self.trace)
+        with open(self.fileName, "rb+") as fd:
+            fd.truncate(os.path.getsize(self.fileName) - 1)
+
+        records = self.journal.replay()
+
+        self.assertEqual([record.type for record in records], [RECORD_LAP])
+
+
+    def test_replayCorrupt(self):
+        self.journal.recordLap("alpha", 61000)
+        with open(self.fileName, "rb+") as fd:
+            fd.seek(-1, os.SEEK_END)
+            fd.write(b"X")
+
+        self.assertEqual(self.journal.replay(), [])
+
+
+    def test_batched(self):
+        """
+        Records made while a sync is queued are written by that sync.
+        """
+        writer = BackgroundWriter()
+        jobs = []
+        writer.submit = lambda function, *args: jobs.append(function) or True
+        journal = Journal(self.fileName, writer)
+
+        for lapTime in (61000, 62000, 63000):
+            journal.recordLap("alpha", lapTime)
+        self.assertEqual(len(jobs), 1)
+
+        jobs[0]()
+        self.assertEqual([record.time for record in journal.replay()],
+                [61000, 62000, 63000])
+
+
+    def test_droppedSync(self):
+        """
+        A sync dropped by a full writer is queued again with the next record.
+        """
+        writer = BackgroundWriter()
+        jobs = []
+        writer.submit = lambda function, *args: jobs.append(function) or len(jobs) > 1
+        journal = Journal(self.fileName, writer)
+
+        journal.recordLap("alpha", 61000)
+        journal.recordLap("alpha", 62000)
+        self.assertEqual(len(jobs), 2)
+
+        jobs[1]()
+        self.assertEqual([record.time for record in journal.replay()], [61000, 62000])
+
+
+    def test_traceSerialisedBySync(self):
+        """
+        Traces are only serialised by the sync, on the writer thread.
+        """
+        serialised = []
+
+        class Trace(LapTrace):
+            def toBytes(self, compress=False):
+                serialised.append(self)
+                return LapTrace.toBytes(self, compress)
+
+        writer = BackgroundWriter()
+        jobs = []
+        writer.submit = lambda function, *args: jobs.append(function) or True
+        journal = Journal(self.fileName, writer)
+        trace = Trace(self.trace)
+
+        journal.recordBestLap("alpha", 61000, trace)
+        journal.recordPersonalBest("alpha", 61000, trace)
+        self.assertEqual(serialised, [])
+
+        jobs[0]()
+        self.assertEqual(len(serialised), 2)
+        self.assertEqual([record.trace for record in journal.replay()], [self.trace, self.trace])
+
+
+    def test_reset(self):
+        self.journal.recordLap("alpha", 61000)
+        self.journal.reset()
+        self.assertEqual(self.journal.replay(), [])
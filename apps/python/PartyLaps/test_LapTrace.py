@@ -0,0 +1,125 @@
+# python -m unittest test_LapTrace
+
+import os
+import unittest
+import tempfile
+from LapTrace import LapTrace, readTraceFile, writeTraceFile
+
+class TestLapTrace(unittest.TestCase):
+    """
+    Tests for ``LapTrace``.
+    """
+
+    samples = [(0.0, 0), (0.25, 30000), (0.5, 61000), (1.0, 120000)]
+
+    def test_appendAndIndex(self):
+        trace = LapTrace()
+        for position, time in self.samples:
+            trace.append(position, time)
+        self.assertEqual(len(trace), 4)
+        self.assertEqual(trace[1], (0.25, 30000))
+        self.assertEqual(trace[-1], (1.0, 120000))
+        self.assertEqual(list(trace), self.samples)
+
+
+    def test_lastPosition(self):
+        self.assertEqual(LapTrace().lastPosition(), -1)
+        self.assertEqual(LapTrace(self.samples).lastPosition(), 1.0)
+
+
+    def test_bisect(self):
+        trace = LapTrace(self.samples)
+        self.assertEqual(trace.bisect(0.0), 0)
+        self.assertEqual(trace.bisect(0.3), 2)
+        self.assertEqual(trace.bisect(0.5), 2)
+        self.assertEqual(trace.bisect(1.5), 4)
+
+
+    def test_slice(self):
+        trace = LapTrace(self.samples)[1:3]
+        self.assertIsInstance(trace, LapTrace)
+        self.assertEqual(list(trace), self.samples[1:3])
+
+
+    def test_copy(self):
+        trace = LapTrace(self.samples)
+        copy = trace.copy()
+        copy.append(1.5, 150000)
+        self.assertEqual(len(trace), 4)
+        self.assertEqual(len(copy), 5)
+
+
+    def test_equality(self):
+        trace = LapTrace(self.samples)
+        self.assertEqual(trace, LapTrace(self.samples))
+        self.assertEqual(trace, self.samples)
+        self.assertNotEqual(trace, LapTrace(self.samples[:2]))
+
+
+    def test_dumpsLoads(self):
+        """
+        A trace survives the text format, which is also the format used by
+        earlier versions.
+        """
+        trace = LapTrace(self.samples)
+        self.assertEqual(LapTrace.loads(trace.dumps()), trace)
+        self.assertEqual(LapTrace.loads(str(self.samples)), trace)
+
+
+    def test_bytes(self):
+        trace = LapTrace(self.samples)
+        data = trace.toBytes()
+        self.assertEqual(len(data), 12 + 8 * len(self.samples))
+        self.assertEqual(LapTrace.fromBytes(data), trace)
+
+
+    def test_bytesEmpty(self):
+        self.assertEqual(LapTrace.fromBytes(LapTrace().toBytes()), LapTrace())
+
+
+    def test_bytesInvalid(self):
+        data = LapTrace(self.samples).toBytes()
+        self.assertRaises(ValueError, LapTrace.fromBytes, b"XXXX" + data[4:])
+        self.assertRaises(ValueError, LapTrace.fromBytes, data[:-1])
+        self.assertRaises(ValueError, LapTrace.fromBytes, data[:5])
+
+
+    def test_traceFile(self):
+        fd, fileName = tempfile.mkstemp(".trace")
+        os.close(fd)
+        self.addCleanup(os.remove, fileName)
+        trace = LapTrace(self.samples)
+        writeTraceFile(fileName, trace)
+        self.assertEqual(readTraceFile(fileName), trace)
+
+
+    def test_bytesCompressed(self):
+        trace = LapTrace(self.samples)
+        self.assertEqual(LapTrace.fromBytes(trace.toBytes(True)), trace)
+
+
+    def test_bytesCompressedNegative(self):
+        """
+        Traces which go backwards or have negative times survive compression.
+        """
+        trace = LapTrace([(0.5, -5), (0.25, 3), (0.0, -100000), (1.0, 2 ** 31 - 1)])
+        self.assertEqual(LapTrace.fromBytes(trace.toBytes(True)), trace)
+
+
+    def test_bytesCompressedSmaller(self):
+        trace = LapTrace((index / 1000.0, index * 120) for index in range(1001))
+        self.assertLess(len(trace.toBytes(True)), len(trace.toBytes()) / 4)
+
+
+    def test_bytesCompressedInvalid(self):
+        data = LapTrace(self.samples).toBytes(True)
+        self.assertRaises(ValueError, LapTrace.fromBytes, data[:-1])
+
+
+    def test_traceFileCompressed(self):
+        fd, fileName = tempfile.mkstemp(".trace")
+        os.close(fd)
+        self.addCleanup(os.remove, fileName)
+        trace = LapTrace(self.samples)
+        writeTraceFile(fileName, trace, compress=True)
+        self.assertEqual(readTraceFile(fileName), trace)
@@ -1,12 +1,19 @@
 # python -m unittest
+import os
 import unittest
 import tempfile
+import random
+import configparser
 
-from PartyLaps import cycleDriver, PartyLaps
-
-class ACNOOP(object):
-    def newApp(*args):
-        pass
+import PartyLaps as PartyLapsModule
+from PartyLaps import cycleDriver, calculateDelta, DeltaGrid, PartyLaps
+from PartyLaps import DeltaColors, deltaToColor, PartyLaps_config
+from PartyLaps import REFRESH_STYLE
+from BackgroundWriter import BackgroundWriter
+from PartyLaps_lib.sim_info import SimInfo, BufferPages, AC_LIVE, AC_PAUSE
+from LapTrace import LapTrace
+from Journal import Journal
+from Replay import FakeAC, FakeACSys
 
 class TestCycleDrivers(unittest.TestCase):
     """
@@ -36,14 +43,163 @@ class TestCycleDrivers(unittest.TestCase):
         self.assertEqual(result, "alpha")
 
 
+def linearDelta(position, currentTime, lapData):
+    """
+    The original linear scan implementation of ``calculateDelta``, used as a
+    reference.
+    """
+    if len(lapData):
+        index = 0
+        while position > lapData[index][0]:
+            index += 1
+        if index == 0:
+            return 0
+        bestLapDeltaPos  = lapData[index][0] - lapData[index-1][0]
+        bestLapDeltaTime = lapData[index][1] - lapData[index-1][1]
+        currentDeltaPos  = position - lapData[index-1][0]
+        currentDeltaTime = currentDeltaPos*bestLapDeltaTime/bestLapDeltaPos
+        return currentTime - lapData[index-1][1] - currentDeltaTime
+    return 0
+
+
+def sampleLap(count, lapTime=120000, seed=1):
+    """
+    Return a reference lap with ``count`` irregularly spaced samples.
+    """
+    rng = random.Random(seed)
+    positions = sorted(rng.random() for i in range(count))
+    lapData = LapTrace([(0.0, 0.0)])
+    for position in positions:
+        lapData.append(position, int(position * lapTime * rng.uniform(0.95, 1.05)))
+    lapData.append(1.0, lapTime)
+    return lapData
+
+
+class TestCalculateDelta(unittest.TestCase):
+    """
+    Tests for ``calculateDelta`` and ``DeltaGrid``.
+    """
+
+    def test_noReference(self):
+        self.assertEqual(calculateDelta(0.5, 1000, LapTrace()), 0)
+        self.assertEqual(calculateDelta(0.5, 1000, LapTrace(), DeltaGrid()), 0)
+
+    def test_startOfLap(self):
+        lapData = sampleLap(10)
+        self.assertEqual(calculateDelta(0.0, 0, lapData, DeltaGrid()), 0)
+
+    def test_matchesLinearScan(self):
+        """
+        Without a grid the result is identical to the linear scan.
+        """
+        lapData = sampleLap(500)
+        rng = random.Random(2)
+        for i in range(1000):
+            position = rng.random()
+            self.assertEqual(calculateDelta(position, 60000, lapData),
+                    linearDelta(position, 60000, lapData))
+
+    def test_gridForward(self):
+        """
+        A grid following a lap gives the same results as the linear scan.
+        """
+        lapData = sampleLap(2000)
+        grid = DeltaGrid()
+        position = 0.0
+        rng = random.Random(3)
+        while position < 1.0:
+            currentTime = int(position * 121000)
+            self.assertEqual(
+                    calculateDelta(position, currentTime, lapData, grid),
+                    linearDelta(position, currentTime, lapData))
+            position += rng.uniform(0, 0.002)
+
+    def test_gridJumps(self):
+        """
+        A grid copes with the position jumping backwards and forwards.
+        """
+        lapData = sampleLap(2000)
+        grid = DeltaGrid()
+        rng = random.Random(4)
+        for i in range(1000):
+            position = rng.random()
+            self.assertEqual(calculateDelta(position, 50000, lapData, grid),
+                    linearDelta(position, 50000, lapData))
+
+    def test_denseReference(self):
+        """
+        A reference lap with several samples per bucket gives the same
+        results as the linear scan.
+        """
+        lapData = sampleLap(2000)
+        grid = DeltaGrid(100)
+        rng = random.Random(7)
+        for i in range(1000):
+            position = rng.random()
+            self.assertEqual(calculateDelta(position, 50000, lapData, grid),
+                    linearDelta(position, 50000, lapData))
+
+    def test_gridBounds(self):
+        """
+        Positions on and past the end of the lap are handled.
+        """
+        lapData = sampleLap(100)
+        grid = DeltaGrid()
+        for position in (0.0, 1.0, 1.5, -0.1):
+            self.assertEqual(calculateDelta(position, 50000, lapData, grid),
+                    calculateDelta(position, 50000, lapData))
+
+    def test_gridNewReference(self):
+        """
+        A grid notices when it is given a different reference lap.
+        """
+        grid = DeltaGrid()
+        first = sampleLap(100, seed=5)
+        second = sampleLap(1000, seed=6)
+        calculateDelta(0.9, 100000, first, grid)
+        self.assertEqual(calculateDelta(0.3, 40000, second, grid),
+                linearDelta(0.3, 40000, second))
+
+    def test_gridBuiltByWriter(self):
+        """
+        With a writer the grid is built by a queued job, and the lap is
+        searched by bisection until the job has run.
+        """
+        jobs = []
+        writer = BackgroundWriter()
+        writer.submit = lambda function, *args: jobs.append((function, args)) or True
+        grid = DeltaGrid(writer=writer)
+        lapData = sampleLap(1000, seed=7)
+        for position in (0.1, 0.5, 0.9):
+            self.assertEqual(calculateDelta(position, 50000, lapData, grid),
+                    linearDelta(position, 50000, lapData))
+        self.assertEqual(len(jobs), 1)
+        self.assertIsNot(grid.built[0], lapData)
+
+        function, args = jobs.pop()
+        function(*args)
+        self.assertIs(grid.built[0], lapData)
+        for position in (0.1, 0.5, 0.9):
+            self.assertEqual(calculateDelta(position, 50000, lapData, grid),
+                    linearDelta(position, 50000, lapData))
+        self.assertEqual(jobs, [])
+
+
 class TestPersonalBests(unittest.TestCase):
     """
     Tests for reading and writing personal bests.
     """
 
     def setUp(self):
-        self.app = PartyLaps(ACNOOP(), "", "", object())
-        self.app.bestLapFile = tempfile.NamedTemporaryFile().name
+        self.app = PartyLaps(FakeAC(), "", "", object())
+        self.directory = tempfile.mkdtemp()
+        self.app.bestLapFile = os.path.join(self.directory, "track - car.ini")
+
+
+    def tearDown(self):
+        for fileName in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, fileName))
+        os.rmdir(self.directory)
 
 
     def test_writeReadSimple(self):
@@ -53,7 +209,7 @@ class TestPersonalBests(unittest.TestCase):
         driver = "alpha"
         pb = {
                 "time": 1234567890,
-                "data": [(0, 0), (1, 1), (2, 2)],
+                "data": LapTrace([(0, 0), (1, 1), (2, 2)]),
         }
         self.app.personalBests = {
             driver: pb,
@@ -64,6 +220,7 @@ class TestPersonalBests(unittest.TestCase):
         self.app.personalBests = {}
 
         self.app.readPersonalBests()
+        self.app.loadPersonalBestData(driver)
 
         self.assertEqual(self.app.personalBests[driver], pb)
 
@@ -75,7 +232,7 @@ class TestPersonalBests(unittest.TestCase):
         driver = "alpha' omegea"
         pb = {
                 "time": 1234567890,
-                "data": [(0, 0), (1, 1), (2, 2)],
+                "data": LapTrace([(0, 0), (1, 1), (2, 2)]),
         }
         self.app.personalBests = {
             driver: pb,
@@ -86,6 +243,7 @@ class TestPersonalBests(unittest.TestCase):
         self.app.personalBests = {}
 
         self.app.readPersonalBests()
+        self.app.loadPersonalBestData(driver)
 
         self.assertEqual(self.app.personalBests[driver], pb)
 
@@ -97,7 +255,7 @@ class TestPersonalBests(unittest.TestCase):
         driver = "alpha⛄️omegea"
         pb = {
                 "time": 1234567890,
-                "data": [(0, 0), (1, 1), (2, 2)],
+                "data": LapTrace([(0, 0), (1, 1), (2, 2)]),
         }
         self.app.personalBests = {
             driver: pb,
@@ -108,5 +266,689 @@ class TestPersonalBests(unittest.TestCase):
         self.app.personalBests = {}
 
         self.app.readPersonalBests()
+        self.app.loadPersonalBestData(driver)
 
         self.assertEqual(self.app.personalBests[driver], pb)
+
+
+    def test_writeBinaryTrace(self):
+        """
+        The trace of a personal best is written to a binary trace file rather
+        than the best lap file.
+        """
+        driver = "alpha"
+        self.app.personalBests = {
+            driver: {"time": 1234, "data": LapTrace([(0, 0), (1, 1234)])},
+        }
+
+        self.app.writePersonalBests()
+
+        config = configparser.ConfigParser()
+        config.read(self.app.bestLapFile)
+        self.assertFalse(config.has_option("PB_alpha", "data"))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory, config.get("PB_alpha", "trace"))))
+
+
+    def test_readLegacy(self):
+        """
+        Personal bests written by earlier versions, with the trace in the best
+        lap file, can be read.
+        """
+        config = configparser.ConfigParser()
+        config.add_section("PB_alpha")
+        config.set("PB_alpha", "driver", "alpha")
+        config.set("PB_alpha", "time", "1234")
+        config.set("PB_alpha", "data", "[(0.0, 0.0), (0.5, 600), (1.0, 1234)]")
+        with open(self.app.bestLapFile, "w") as fd:
+            config.write(fd)
+
+        self.app.readPersonalBests()
+        self.app.loadPersonalBestData("alpha")
+
+        self.assertEqual(self.app.personalBests["alpha"], {
+            "time": 1234,
+            "data": LapTrace([(0, 0), (0.5, 600), (1, 1234)]),
+        })
+
+
+    def test_resetRemovesTraces(self):
+        """
+        Resetting the best lap removes the best lap file and its traces.
+        """
+        self.app.personalBests = {
+            "alpha": {"time": 1234, "data": LapTrace([(0, 0), (1, 1234)])},
+        }
+        self.app.writePersonalBests()
+
+        self.app.resetBestLap()
+
+        self.assertEqual(os.listdir(self.directory), [])
+
+
+    def test_resetAfterQueuedWrites(self):
+        """
+        The files are removed after the writes queued before the reset, and
+        the traces of other cars are kept.
+        """
+        jobs = []
+        self.app.writer.submit = lambda function, *args: jobs.append((function, args)) or True
+        other = os.path.join(self.directory, "track - car.s1.pb-616c706861.trace")
+        open(other, "wb").close()
+
+        self.app.bestLapTime = 1234
+        self.app.bestLapData = LapTrace([(0, 0), (1, 1234)])
+        self.app.personalBests = {
+            "alpha": {"time": 1234, "data": LapTrace([(0, 0), (1, 1234)])},
+        }
+        self.app.persistBestLap()
+        self.app.resetBestLap()
+        for function, args in jobs:
+            function(*args)
+
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(other)])
+        self.assertIsNone(self.app.writtenBestLap)
+        self.assertEqual(self.app.writtenPersonalBests, {})
+
+
+    def test_resetDuringWrite(self):
+        """
+        Personal bests written while the files are reset are not taken as
+        written, so the next write puts them back.
+        """
+        self.app.personalBests = {
+            "alpha": {"time": 1234, "data": LapTrace([(0, 0), (1, 1234)])},
+        }
+        writeConfigFile = PartyLapsModule.writeConfigFile
+        def resetAfterWrite(config, fileName):
+            writeConfigFile(config, fileName)
+            self.app.resetBestLap()
+        PartyLapsModule.writeConfigFile = resetAfterWrite
+        try:
+            self.app.writePersonalBests()
+        finally:
+            PartyLapsModule.writeConfigFile = writeConfigFile
+        self.assertEqual(self.app.writtenPersonalBests, {})
+
+        self.app.writePersonalBests()
+        self.app.readPersonalBests()
+        self.assertEqual(self.app.loadPersonalBestData("alpha"),
+                LapTrace([(0, 0), (1, 1234)]))
+
+
+    def test_replayJournal(self):
+        """
+        Personal bests left in the journal by a crash are recovered and
+        written to the best lap file.
+        """
+        self.app.personalBests = {
+            "alpha": {"time": 70000, "data": LapTrace([(0, 0), (1, 70000)])},
+            "beta": {"time": 60000, "data": LapTrace([(0, 0), (1, 60000)])},
+        }
+        self.app.writePersonalBests()
+
+        journal = Journal(os.path.join(self.directory, "track - car.journal"), self.app.writer)
+        journal.recordPersonalBest("alpha", 65000, LapTrace([(0, 0), (1, 65000)]))
+        journal.recordPersonalBest("beta", 61000, LapTrace([(0, 0), (1, 61000)]))
+
+        self.app.readBestLap()
+
+        self.assertEqual(self.app.personalBests["alpha"]["time"], 65000)
+        self.assertEqual(self.app.personalBests["beta"]["time"], 60000)
+        self.assertFalse(os.path.exists(journal.fileName))
+
+        self.app.personalBests = {}
+        self.app.readPersonalBests()
+        self.assertEqual(self.app.loadPersonalBestData("alpha"),
+                LapTrace([(0, 0), (1, 65000)]))
+
+
+    def test_writeOnlyChanged(self):
+        """
+        Only the personal bests which changed since the last write are
+        serialized again.
+        """
+        alpha = {"time": 70000, "data": LapTrace([(0, 0), (1, 70000)])}
+        self.app.personalBests = {"alpha": alpha}
+        self.app.writePersonalBests()
+
+        alphaTrace = self.app.traceFileName(self.app.personalBestTraceName("alpha"))
+        os.remove(alphaTrace)
+
+        self.app.personalBests["beta"] = {"time": 60000, "data": LapTrace([(0, 0), (1, 60000)])}
+        self.app.writePersonalBests()
+
+        self.assertFalse(os.path.exists(alphaTrace))
+        self.assertTrue(os.path.exists(
+            self.app.traceFileName(self.app.personalBestTraceName("beta"))))
+
+        self.app.personalBests["alpha"] = {"time": 65000, "data": LapTrace([(0, 0), (1, 65000)])}
+        self.app.writePersonalBests()
+
+        self.assertTrue(os.path.exists(alphaTrace))
+
+
+    def test_writeBestLapOnce(self):
+        """
+        The best lap is not written again if it did not change, and no
+        temporary files are left behind.
+        """
+        self.app.bestLapTime = 60000
+        self.app.bestLapHolder = "alpha"
+        self.app.bestLapData = LapTrace([(0, 0), (1, 60000)])
+        self.app.writeBestLap()
+
+        bestTrace = self.app.traceFileName("best")
+        os.remove(bestTrace)
+        self.app.writeBestLap()
+
+        self.assertFalse(os.path.exists(bestTrace))
+        self.assertEqual(os.listdir(self.directory), ["track - car.ini"])
+
+
+    def test_readLazily(self):
+        """
+        Personal best times are read straight away, their traces only when
+        they are first needed.
+        """
+        self.app.personalBests = {
+            "alpha": {"time": 70000, "data": LapTrace([(0, 0), (1, 70000)])},
+            "beta": {"time": 60000, "data": LapTrace([(0, 0), (1, 60000)])},
+        }
+        self.app.writePersonalBests()
+
+        self.app.readPersonalBests()
+
+        self.assertEqual(self.app.personalBests["alpha"], {"time": 70000, "data": None})
+        self.assertEqual(self.app.loadPersonalBestData("alpha"),
+                LapTrace([(0, 0), (1, 70000)]))
+        self.assertIsNone(self.app.personalBests["beta"]["data"])
+
+        self.app.prefetchPersonalBest("beta")
+        self.assertEqual(self.app.personalBests["beta"]["data"],
+                LapTrace([(0, 0), (1, 60000)]))
+
+
+    def test_unloadedNotRewritten(self):
+        """
+        Personal bests whose trace was never loaded are left as they are.
+        """
+        self.app.personalBests = {
+            "alpha": {"time": 70000, "data": LapTrace([(0, 0), (1, 70000)])},
+        }
+        self.app.writePersonalBests()
+        self.app.readPersonalBests()
+
+        self.app.personalBests["beta"] = {"time": 60000, "data": LapTrace([(0, 0), (1, 60000)])}
+        self.app.writePersonalBests()
+
+        self.app.readPersonalBests()
+        self.assertEqual(self.app.loadPersonalBestData("alpha"),
+                LapTrace([(0, 0), (1, 70000)]))
+
+
+    def test_traceNotReadOnFrame(self):
+        """
+        A trace needed before it is loaded is queued to be loaded and reads
+        as empty meanwhile.
+        """
+        self.app.personalBests = {
+            "alpha": {"time": 70000, "data": LapTrace([(0, 0), (1, 70000)])},
+        }
+        self.app.writePersonalBests()
+        self.app.readPersonalBests()
+
+        jobs = []
+        self.app.writer.submit = lambda function, *args: jobs.append((function, args)) or True
+        saved = PartyLapsModule.currentDriver
+        PartyLapsModule.currentDriver = "alpha"
+        try:
+            self.assertEqual(self.app.personalBestData(), LapTrace())
+            self.assertEqual(self.app.personalBestData(), LapTrace())
+        finally:
+            PartyLapsModule.currentDriver = saved
+        self.assertIsNone(self.app.personalBests["alpha"]["data"])
+        self.assertEqual(len(jobs), 1)
+
+        function, args = jobs.pop()
+        function(*args)
+        self.assertEqual(self.app.personalBests["alpha"]["data"],
+                LapTrace([(0, 0), (1, 70000)]))
+
+
+class TestLapList(unittest.TestCase):
+    """
+    Tests for scrolling the lap rows over a long session.
+    """
+
+    def setUp(self):
+        self.app = PartyLaps(FakeAC(), "", "", object())
+        self.app.draw()
+        self.rowCount = PartyLapsModule.lapDisplayedCount
+
+    def lapNumbers(self):
+        table = self.app.table
+        return [table.texts[table.getCellLabel(0, row)] for row in range(1, self.rowCount + 1)]
+
+    def addLaps(self, count):
+        for index in range(count):
+            self.app.laps.append(60000 + len(self.app.laps))
+        self.app.updateViewLaps()
+
+
+    def test_followsLastLaps(self):
+        self.addLaps(200)
+        self.assertEqual(self.lapNumbers()[-1], "200.")
+        self.assertEqual(self.app.firstLapIndex(), 200 - self.rowCount)
+
+
+    def test_scroll(self):
+        """
+        A scrolled list stays put when laps are added, until it is scrolled
+        back down to the last lap.
+        """
+        self.addLaps(200)
+        self.app.scrollLaps(-100)
+        self.assertEqual(self.lapNumbers()[0], "%d." % (101 - self.rowCount))
+
+        self.addLaps(1)
+        self.assertEqual(self.lapNumbers()[0], "%d." % (101 - self.rowCount))
+
+        self.app.scrollLaps(1000)
+        self.assertEqual(self.lapNumbers()[-1], "201.")
+        self.addLaps(1)
+        self.assertEqual(self.lapNumbers()[-1], "202.")
+
+
+    def test_scrollStopsAtFirstLap(self):
+        self.addLaps(200)
+        self.app.scrollLaps(-1000)
+        self.assertEqual(self.lapNumbers()[0], "1.")
+
+
+    def test_clickAfterRowCountChanges(self):
+        """
+        Clicking a lap number scrolls according to the rows displayed now,
+        not to the rows when the table was first drawn.
+        """
+        saved = (PartyLapsModule.partyLapsApp, PartyLapsModule.lapDisplayedCount)
+        PartyLapsModule.partyLapsApp = self.app
+        ac = self.app.ac
+
+        def click(row):
+            ac.click(self.app.table.getCellLabel(0, row))
+
+        try:
+            self.addLaps(20)
+            PartyLapsModule.lapDisplayedCount = 5
+            self.app.draw()
+            PartyLapsModule.lapDisplayedCount = 3
+            self.app.draw()
+            click(1)
+            self.assertEqual(self.app.firstLapIndex(), 16)
+            # Row 5 is not a lap row any more
+            click(5)
+            self.assertEqual(self.app.firstLapIndex(), 16)
+            click(3)
+            self.assertEqual(self.app.firstLapIndex(), 17)
+
+            PartyLapsModule.lapDisplayedCount = 1
+            self.app.draw()
+            click(1)
+            self.assertEqual(self.app.firstLapIndex(), 18)
+        finally:
+            PartyLapsModule.partyLapsApp, PartyLapsModule.lapDisplayedCount = saved
+
+
+    def test_onlyNewRowUpdated(self):
+        """
+        Before the rows are full, a new lap only updates its own row.
+        """
+        self.addLaps(1)
+        ac = self.app.ac
+        ac.calls.clear()
+        self.addLaps(1)
+        row = [self.app.table.getCellLabel(column, 2) for column in range(3)]
+        self.assertEqual(ac.calls["setText"], 2)
+        self.assertEqual([ac.controls[label].text for label in row[1:]], ["1:00.001", "+60.001"])
+
+
+class TestDeltaColors(unittest.TestCase):
+    """
+    Tests for the delta color lookup table.
+    """
+
+    def setUp(self):
+        self.settings = (PartyLapsModule.redAt, PartyLapsModule.greenAt,
+                PartyLapsModule.deltaColor)
+
+    def tearDown(self):
+        (PartyLapsModule.redAt, PartyLapsModule.greenAt,
+                PartyLapsModule.deltaColor) = self.settings
+
+    def configure(self, redAt, greenAt, deltaColor):
+        PartyLapsModule.redAt = redAt
+        PartyLapsModule.greenAt = greenAt
+        PartyLapsModule.deltaColor = deltaColor
+
+
+    def test_exactWithUnitStep(self):
+        colors = DeltaColors(1)
+        for settings in [(500, -500, "white"), (1200, -300, "yellow"), (0, 0, "white")]:
+            self.configure(*settings)
+            for delta in range(-2000, 2000):
+                self.assertEqual(colors.lookup(delta), deltaToColor(delta))
+
+
+    def test_closeWithDefaultStep(self):
+        self.configure(1000, -1000, "yellow")
+        colors = DeltaColors()
+        for delta in range(-1500, 1500, 7):
+            for expected, actual in zip(deltaToColor(delta), colors.lookup(delta + 0.5)):
+                self.assertAlmostEqual(expected, actual, delta=0.011)
+
+
+    def test_rebuiltOnChange(self):
+        colors = DeltaColors()
+        self.configure(1000, -1000, "yellow")
+        self.assertEqual(colors.lookup(500), (1, 0.5, 0))
+        self.configure(1000, -1000, "white")
+        self.assertEqual(colors.lookup(500), (1, 0.5, 0.5))
+        self.configure(1000, -1000, "unknown")
+        self.assertEqual(colors.lookup(500), None)
+        self.assertEqual(colors.lookup(1000), (1, 0, 0))
+
+
+class TestConfigView(unittest.TestCase):
+    """
+    Tests for updating the config widget only where something changed.
+    """
+
+    class App(object):
+        bestLapTime = 0
+
+    def setUp(self):
+        self.ac = FakeAC()
+        self.saved = (PartyLapsModule.__dict__.get("ac"), PartyLapsModule.partyLapsApp,
+                PartyLapsModule.fontSize)
+        PartyLapsModule.ac = self.ac
+        PartyLapsModule.partyLapsApp = self.App()
+        self.config = PartyLaps_config("", "", 18, 0)
+        self.config.updateView()
+        self.ac.calls.clear()
+
+    def tearDown(self):
+        ac, PartyLapsModule.partyLapsApp, PartyLapsModule.fontSize = self.saved
+        if ac is None:
+            del PartyLapsModule.ac
+        else:
+            PartyLapsModule.ac = ac
+
+
+    def test_unchangedSetsNothing(self):
+        self.config.updateView()
+        self.assertEqual(self.ac.calls["setText"], 0)
+
+
+    def test_onlyChangedRow(self):
+        PartyLapsModule.fontSize += 1
+        self.config.updateView(("fontSize",))
+        label = self.config.centerLabel[self.config.fontSizeId]
+        self.assertEqual(self.ac.calls["setText"], 1)
+        self.assertEqual(self.ac.controls[label].text, str(PartyLapsModule.fontSize))
+
+
+    def test_driversPolledSlowly(self):
+        for frame in range(59):
+            self.config.pollDriversInput(1.0 / 60)
+        self.assertEqual(self.ac.calls["getText"], 0)
+        self.config.pollDriversInput(1.0 / 30)
+        self.assertEqual(self.ac.calls["getText"], 1)
+
+
+class TestPartialRefresh(unittest.TestCase):
+    """
+    Tests for refreshing only what a parameter change affects.
+    """
+
+    class DeltaApp(object):
+        def onRenderCallback(self):
+            pass
+
+    def setUp(self):
+        self.redAt = PartyLapsModule.redAt
+        self.app = PartyLaps(FakeAC(), "", "", self.DeltaApp())
+        self.app.draw()
+
+    def tearDown(self):
+        PartyLapsModule.redAt = self.redAt
+
+
+    def test_styleRefreshRecolors(self):
+        PartyLapsModule.redAt = 1000
+        self.app.laps = [60000, 60500]
+        self.app.referenceTime = 60000
+        self.app.updateViewLaps()
+        table = self.app.table
+        label = table.getCellLabel(2, 2)
+        before = table.colors[label]
+
+        self.app.draw = lambda: self.fail("The table was redrawn")
+        PartyLapsModule.redAt = 500
+        self.app.refreshParameters(REFRESH_STYLE)
+        self.assertNotEqual(table.colors[label], before)
+        self.assertEqual(table.colors[label], (1, 0, 0, 1))
+
+
+    def test_refreshWhilePaused(self):
+        """
+        A change made while the game is paused is displayed right away.
+        """
+        saved = dict(vars(PartyLapsModule))
+        info = SimInfo(BufferPages())
+        try:
+            info.graphics.status = AC_PAUSE
+            PartyLapsModule.acsys = FakeACSys()
+            PartyLapsModule.sim = info.snapshot()
+            PartyLapsModule.reference = "median"
+            self.app.laps = [60000, 62000, 64000]
+            self.app.ac.frame.lapCount = 3
+            self.app.ac.frame.lapTime = 30000
+            self.app.ac.calls.clear()
+
+            self.app.refreshParameters(PartyLapsModule.PARAMETER_REFRESH["reference"])
+
+            label = self.app.table.getCellLabel(1, self.app.refRowIndex)
+            self.assertEqual(self.app.ac.controls[label].text, "1:02.000")
+            self.assertGreater(self.app.ac.calls["getCarState"], 0)
+        finally:
+            for name in set(vars(PartyLapsModule)) - set(saved):
+                delattr(PartyLapsModule, name)
+            vars(PartyLapsModule).update(saved)
+            info.close()
+
+
+    def test_referenceRelabelled(self):
+        """
+        Changing the reference renames its row without a redraw.
+        """
+        saved = dict(vars(PartyLapsModule))
+        info = SimInfo(BufferPages())
+        try:
+            PartyLapsModule.ac = self.app.ac
+            PartyLapsModule.acsys = FakeACSys()
+            PartyLapsModule.partyLapsApp = self.app
+            PartyLapsModule.configApp = self.DeltaApp()
+            PartyLapsModule.configApp.updateView = lambda names: None
+            PartyLapsModule.config = configparser.ConfigParser()
+            PartyLapsModule.config.add_section("SETTINGS")
+            PartyLapsModule.reference = "best"
+            PartyLapsModule.sim = info.snapshot()
+            self.app.draw()
+            self.app.draw = lambda: self.fail("The table was redrawn")
+
+            PartyLapsModule.toggleRefSource(0, 0)
+
+            label = self.app.table.getCellLabel(0, self.app.refRowIndex)
+            self.assertEqual(self.app.ac.controls[label].text, "Med.")
+            self.assertEqual(self.app.ac.errors(), [])
+        finally:
+            for name in set(vars(PartyLapsModule)) - set(saved):
+                delattr(PartyLapsModule, name)
+            vars(PartyLapsModule).update(saved)
+            info.close()
+
+
+class TestConfigWrites(unittest.TestCase):
+    """
+    Tests for coalescing config.ini writes.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.fileName = os.path.join(self.directory, "config.ini")
+        self.saved = (PartyLapsModule.config, PartyLapsModule.configFileName,
+                PartyLapsModule.writer)
+        PartyLapsModule.config = configparser.ConfigParser()
+        PartyLapsModule.config.add_section("SETTINGS")
+        PartyLapsModule.configFileName = self.fileName
+        PartyLapsModule.writer = BackgroundWriter()
+
+    def tearDown(self):
+        (PartyLapsModule.config, PartyLapsModule.configFileName,
+                PartyLapsModule.writer) = self.saved
+        PartyLapsModule.configDirty = False
+        for fileName in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, fileName))
+        os.rmdir(self.directory)
+
+
+    def test_writtenAfterQuietPeriod(self):
+        delay = PartyLapsModule.configWriteDelay
+        PartyLapsModule.markParametersChanged()
+        PartyLapsModule.updateParameters(delay / 2)
+        PartyLapsModule.markParametersChanged()
+        PartyLapsModule.updateParameters(delay / 2)
+        self.assertFalse(os.path.exists(self.fileName))
+
+        PartyLapsModule.updateParameters(delay / 2)
+        config = configparser.ConfigParser()
+        config.read(self.fileName)
+        self.assertEqual(config.getint("SETTINGS", "fontSize"), PartyLapsModule.fontSize)
+
+
+    def test_flushOnlyWhenChanged(self):
+        PartyLapsModule.markParametersChanged()
+        PartyLapsModule.flushParameters()
+        os.remove(self.fileName)
+        PartyLapsModule.flushParameters()
+        self.assertFalse(os.path.exists(self.fileName))
+
+
+class TestSimulationAdvancing(unittest.TestCase):
+    """
+    Tests for skipping updates while the game is not running.
+    """
+
+    def setUp(self):
+        self.info = SimInfo(BufferPages())
+        self.info.graphics.status = AC_LIVE
+        self.saved = PartyLapsModule.sim
+        PartyLapsModule.sim = self.info.snapshot()
+        self.app = PartyLaps(FakeAC(), "", "", object())
+
+    def tearDown(self):
+        PartyLapsModule.sim = self.saved
+        self.info.close()
+
+
+    def test_advancing(self):
+        self.assertTrue(PartyLapsModule.simulationAdvancing())
+
+
+    def test_frozen(self):
+        self.info.snapshot()
+        self.assertFalse(PartyLapsModule.simulationAdvancing())
+        self.app.updateData()
+        self.app.updateViewDelta()
+        self.assertEqual(self.app.ac.calls["getCarState"], 0)
+
+
+    def test_snapshotBound(self):
+        """
+        Every frame updates the snapshot the updates read.
+        """
+        saved = dict(vars(PartyLapsModule))
+        PartyLapsModule.info = self.info
+        PartyLapsModule.partyLapsApp = self.app
+        PartyLapsModule.recorder = None
+        PartyLapsModule.sim = None
+        try:
+            PartyLapsModule.updateTelemetry(0)
+            self.assertIs(PartyLapsModule.sim, self.info.snapshot())
+        finally:
+            vars(PartyLapsModule).update(saved)
+
+
+    def test_torn(self):
+        """
+        A snapshot the game kept writing while it was copied is skipped.
+        """
+        PartyLapsModule.sim.consistent = False
+        self.assertFalse(PartyLapsModule.simulationAdvancing())
+        self.app.updateData()
+        self.assertEqual(self.app.ac.calls["getCarState"], 0)
+
+
+    def test_paused(self):
+        self.info.graphics.status = AC_PAUSE
+        self.info.graphics.packetId += 1
+        self.info.snapshot()
+        self.assertFalse(PartyLapsModule.simulationAdvancing())
+        self.app.updateData()
+        self.assertEqual(self.app.ac.calls["getCarState"], 0)
+
+
+class TestNewLap(unittest.TestCase):
+    """
+    Tests for reading the last lap time once the game has updated it.
+    """
+
+    def setUp(self):
+        self.saved = dict(vars(PartyLapsModule))
+        self.info = SimInfo(BufferPages())
+        self.info.graphics.status = AC_LIVE
+        PartyLapsModule.acsys = FakeACSys()
+        PartyLapsModule.sim = self.info.snapshot()
+        self.app = PartyLaps(FakeAC(), "", "", object())
+        self.app.draw()
+
+    def tearDown(self):
+        for name in set(vars(PartyLapsModule)) - set(self.saved):
+            delattr(PartyLapsModule, name)
+        vars(PartyLapsModule).update(self.saved)
+        self.info.close()
+
+    def frame(self, lapTime, lapCount, lastTime):
+        self.app.ac.frame.lapTime = lapTime
+        self.app.ac.frame.lapCount = lapCount
+        self.app.ac.frame.position = lapTime / 60000.0
+        self.info.graphics.iLastTime = lastTime
+        self.info.physics.packetId += 1
+        self.info.snapshot()
+        self.app.updateData()
+
+
+    def test_waitsForLastLapTime(self):
+        """
+        Frames come every few milliseconds, the last lap time is only read
+        ``newLapWait`` after the new lap shows.
+        """
+        for lapTime in range(1000, 60000, 1000):
+            self.frame(lapTime, 0, 0)
+        # The game updates the last lap time 50ms into the new lap
+        for lapTime in range(0, 200, 4):
+            self.frame(lapTime, 1, 60000 if lapTime >= 50 else 0)
+            if lapTime < PartyLapsModule.newLapWait:
+                self.assertEqual(self.app.laps, [])
+        self.assertEqual(self.app.laps, [60000])
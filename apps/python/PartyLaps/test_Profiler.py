@@ -0,0 +1,91 @@
+# python -m unittest test_Profiler
+import os
+import tempfile
+import unittest
+
+from Profiler import Histogram, Profiler, appendReport
+
+
+class TestHistogram(unittest.TestCase):
+    """
+    Tests for ``Histogram``.
+    """
+
+    def test_empty(self):
+        self.assertEqual(Histogram().percentile(50), 0)
+
+
+    def test_percentiles(self):
+        """
+        Percentiles are the top of the bucket they fall in, at most the
+        maximum.
+        """
+        histogram = Histogram()
+        for nanoseconds in [1000] * 98 + [100000, 5000000]:
+            histogram.record(nanoseconds)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.percentile(50), 1023)
+        self.assertEqual(histogram.percentile(99), 131071)
+        self.assertEqual(histogram.percentile(100), 5000000)
+        self.assertEqual(histogram.max, 5000000)
+
+
+class TestProfiler(unittest.TestCase):
+    """
+    Tests for ``Profiler``.
+    """
+
+    class Clock(object):
+        def __init__(self):
+            self.now = 0
+
+        def __call__(self):
+            self.now += 2000
+            return self.now
+
+    class Target(object):
+        def add(self, a, b):
+            return a + b
+
+
+    def test_wrap(self):
+        profiler = Profiler(self.Clock())
+        double = profiler.wrap("double", lambda x: x * 2)
+        self.assertEqual(double(21), 42)
+        histogram = profiler.histograms["double"]
+        self.assertEqual(histogram.count, 1)
+        self.assertEqual(histogram.max, 2000)
+
+
+    def test_recordsExceptions(self):
+        profiler = Profiler(self.Clock())
+        def fail():
+            raise ValueError()
+        self.assertRaises(ValueError, profiler.wrap("fail", fail))
+        self.assertEqual(profiler.histograms["fail"].count, 1)
+
+
+    def test_instrumentClass(self):
+        original = self.Target.add
+        profiler = Profiler(self.Clock())
+        profiler.instrument(self.Target, "add")
+        try:
+            self.assertEqual(self.Target().add(1, 2), 3)
+            self.assertEqual(profiler.stats(), [("add", 1, 2.0, 2.0, 2.0)])
+        finally:
+            self.Target.add = original
+
+
+    def test_report(self):
+        profiler = Profiler(self.Clock())
+        profiler.wrap("calculateDelta", lambda: None)()
+        fd, fileName = tempfile.mkstemp(".log")
+        os.close(fd)
+        try:
+            appendReport(fileName, profiler.report())
+            appendReport(fileName, profiler.report())
+            with open(fileName, encoding="utf-8") as fd:
+                text = fd.read()
+        finally:
+            os.remove(fileName)
+        self.assertEqual(text.count("calculateDelta"), 2)
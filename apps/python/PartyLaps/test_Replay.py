@@ -0,0 +1,64 @@
+# python -m unittest test_Replay
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+import PartyLaps as PartyLapsModule
+from Replay import Replay, syntheticSession, recordedSession
+from TelemetryRecorder import readTelemetryTrack
+
+
+class TestReplay(unittest.TestCase):
+    """
+    Smoke tests replaying short sessions through PartyLaps.
+    """
+
+    settings = {
+        "driversListText": "Alice, Bob",
+        "recordTelemetry": 1,
+    }
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def replay(self, frames, settings):
+        replay = Replay(self.directory, settings=settings)
+        replay.start()
+        try:
+            replay.run(frames)
+            laps = list(PartyLapsModule.partyLapsApp.laps)
+        finally:
+            replay.stop()
+        self.assertEqual(replay.ac.errors(), [])
+        return replay, laps
+
+
+    def test_synthetic(self):
+        replay, laps = self.replay(syntheticSession(0.02, lapTime=20000, stintLaps=2),
+                self.settings)
+
+        self.assertEqual(replay.frames, 4320)
+        self.assertEqual(len(laps), 3)
+        # Four car states read per frame, shared by the laps and the recorder
+        self.assertEqual(replay.ac.calls["getCarState"], 4 * replay.frames + 4)
+        self.assertEqual(replay.ticks.count, replay.frames)
+        self.assertFalse(hasattr(PartyLapsModule, "ac"))
+        self.assertIn("PartyLaps: Recorded 4320 telemetry records, dropped 0",
+                replay.ac.messages)
+
+        session = os.path.join(self.directory, "apps", "python", "PartyLaps", "PartyLaps_session")
+        self.assertEqual(len(glob.glob(os.path.join(session, "*.log"))), 1)
+        self.assertEqual(len(glob.glob(os.path.join(self.directory, "apps", "python",
+                "PartyLaps", "PartyLaps_bestlap", "*.pb-*.trace"))), 2)
+
+        # The recording replays to the same laps
+        telemetry, = glob.glob(os.path.join(session, "*.telemetry"))
+        self.assertEqual(readTelemetryTrack(telemetry), ("ks_vallelunga", "", "abarth500"))
+        replay, recordedLaps = self.replay(recordedSession(telemetry), {"recordTelemetry": 0})
+        self.assertEqual(replay.frames, 4320)
+        self.assertEqual(recordedLaps, laps)
@@ -0,0 +1,95 @@
+# python -m unittest test_Scheduler
+import unittest
+
+from Scheduler import Scheduler
+
+
+class FakeClock(object):
+    """
+    A clock which only moves when told to, in microseconds.
+    """
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now / 1000000.0
+
+    def work(self, microseconds):
+        self.now += microseconds
+
+
+class TestScheduler(unittest.TestCase):
+    """
+    Tests for ``Scheduler``.
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = Scheduler(frameBudget=1000, maxDeferrals=3, clock=self.clock)
+        self.runs = []
+
+    def task(self, name, cost=0):
+        def run(elapsed):
+            self.runs.append((name, round(elapsed, 6)))
+            self.clock.work(cost)
+        return run
+
+    def frames(self, count, deltaT=0.01):
+        for index in range(count):
+            self.scheduler.tick(deltaT)
+
+
+    def test_intervals(self):
+        self.scheduler.add("frame", self.task("frame"))
+        self.scheduler.add("slow", self.task("slow"), 0.03)
+        self.frames(6)
+        self.assertEqual([run for run in self.runs if run[0] == "slow"],
+                [("slow", 0.03), ("slow", 0.03)])
+        self.assertEqual(len([run for run in self.runs if run[0] == "frame"]), 6)
+
+
+    def test_intervalFunction(self):
+        interval = [0.02]
+        self.scheduler.add("slow", self.task("slow"), lambda: interval[0])
+        self.frames(4)
+        interval[0] = 0.01
+        self.frames(2)
+        self.assertEqual(len(self.runs), 4)
+
+
+    def test_deferredWhenOverBudget(self):
+        """
+        A task is deferred while the frame has no room for it, then runs with
+        the time elapsed since its last run.
+        """
+        self.scheduler.add("heavy", self.task("heavy", 900))
+        self.scheduler.add("light", self.task("light", 100), 0, 200)
+        self.frames(2)
+        self.assertEqual(self.runs, [("heavy", 0.01), ("heavy", 0.01)])
+
+        self.scheduler.tasks[0].function = self.task("heavy", 0)
+        self.frames(1)
+        self.assertEqual(self.runs[-1], ("light", 0.03))
+
+
+    def test_deferralsLimited(self):
+        self.scheduler.add("heavy", self.task("heavy", 2000))
+        self.scheduler.add("light", self.task("light"), 0, 200)
+        self.frames(8)
+        self.assertEqual([run for run in self.runs if run[0] == "light"],
+                [("light", 0.04), ("light", 0.04)])
+
+
+    def test_lastCostCounts(self):
+        """
+        A task which cost more than its budget last time needs that much room.
+        """
+        self.scheduler.add("medium", self.task("medium", 500))
+        self.scheduler.add("spiky", self.task("spiky", 800), 0, 100)
+        self.frames(1)
+        self.assertEqual(self.runs[-1], ("spiky", 0.01))
+        self.frames(3)
+        self.assertEqual(self.runs[-1], ("medium", 0.01))
+        self.frames(1)
+        self.assertEqual(self.runs[-1], ("spiky", 0.04))
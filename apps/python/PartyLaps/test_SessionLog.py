@@ -0,0 +1,91 @@
+# python -m unittest test_SessionLog
+
+import os
+import unittest
+import tempfile
+import configparser
+from SessionLog import appendSession, readSessions, renderSessions, main
+
+class TestSessionLog(unittest.TestCase):
+    """
+    Tests for the session log.
+    """
+
+    first = {
+        "laps": (61234, 60123),
+        "reference": "best",
+        "referenceTime": 60123,
+        "best": 60123,
+        "total": 121357,
+    }
+
+    second = {
+        "laps": (62000, 61000, 63000),
+        "reference": "median",
+        "referenceTime": 62000,
+        "best": 61000,
+        "total": 186000,
+    }
+
+    def setUp(self):
+        fd, self.fileName = tempfile.mkstemp(".log")
+        os.close(fd)
+        os.remove(self.fileName)
+
+
+    def tearDown(self):
+        for fileName in (self.fileName, self.fileName + ".ini"):
+            if os.path.exists(fileName):
+                os.remove(fileName)
+
+
+    def test_appendRead(self):
+        appendSession(self.fileName, self.first)
+        appendSession(self.fileName, self.second)
+
+        sessions = readSessions(self.fileName)
+
+        self.assertEqual(len(sessions), 2)
+        self.assertEqual(sessions[0]["laps"], [61234, 60123])
+        self.assertEqual(sessions[1]["reference"], "median")
+
+
+    def test_skipTornRecord(self):
+        """
+        A record left incomplete by a crash is ignored, and the sessions
+        appended after it are kept.
+        """
+        appendSession(self.fileName, self.first)
+        with open(self.fileName, "a") as fd:
+            fd.write('{"laps": [6123')
+        appendSession(self.fileName, self.second)
+
+        sessions = readSessions(self.fileName)
+        self.assertEqual(len(sessions), 2)
+        self.assertEqual(sessions[1]["laps"], list(self.second["laps"]))
+
+
+    def test_render(self):
+        """
+        Sessions are rendered in the layout of the session ini files.
+        """
+        lapsLog = renderSessions([self.first, self.second])
+
+        self.assertEqual(lapsLog.sections(), ["Session 1", "Session 2"])
+        self.assertEqual(dict(lapsLog["Session 1"]), {
+            "lap 1": "1:01.234",
+            "lap 2": "1:00.123",
+            "best": "1:00.123",
+            "total": "2:01.357",
+        })
+        self.assertEqual(lapsLog.get("Session 2", "Median"), "1:02.000")
+
+
+    def test_main(self):
+        appendSession(self.fileName, self.first)
+
+        self.assertEqual(main(["SessionLog.py", self.fileName, self.fileName + ".ini"]), 0)
+
+        lapsLog = configparser.ConfigParser()
+        lapsLog.read(self.fileName + ".ini")
+        self.assertEqual(lapsLog.get("Session 1", "Lap 2"), "1:00.123")
@@ -0,0 +1,109 @@
+# python -m unittest test_TelemetryRecorder
+import ctypes
+import os
+import tempfile
+import unittest
+
+from BackgroundWriter import BackgroundWriter
+from PartyLaps_lib.sim_info import SimInfo, BufferPages, SPageFileGraphic, AC_LIVE
+from TelemetryRecorder import TelemetryRecorder, readTelemetry, readTelemetryTrack
+from TelemetryRecorder import _pageReader, _recordedPage
+
+
+class IdleWriter(object):
+    """
+    A writer which never gets round to its jobs.
+    """
+    def submit(self, function, *args):
+        return True
+
+
+class TestTelemetryRecorder(unittest.TestCase):
+    """
+    Tests for recording telemetry and reading it back.
+    """
+
+    def setUp(self):
+        fd, self.fileName = tempfile.mkstemp(".telemetry")
+        os.close(fd)
+        self.info = SimInfo(BufferPages())
+        self.info.graphics.status = AC_LIVE
+        self.info.graphics.tyreCompound = "Semislick"
+
+    def tearDown(self):
+        self.info.close()
+        os.remove(self.fileName)
+
+    def drive(self, recorder, frames):
+        for frame in range(frames):
+            self.info.physics.packetId += 1
+            self.info.physics.gas = frame / 100.0
+            snapshot = self.info.snapshot()
+            if recorder.isNewPacket(snapshot):
+                recorder.record(snapshot, frame * 16, 0, 0, frame / 1000.0, 0)
+
+
+    def test_roundTrip(self):
+        recorder = TelemetryRecorder(self.fileName, BackgroundWriter(), 8, 4)
+        self.drive(recorder, 10)
+        recorder.queueFlush()
+
+        records = list(readTelemetry(self.fileName))
+        self.assertEqual([record.lapTime for record in records], [frame * 16 for frame in range(10)])
+        self.assertEqual([record.physics.packetId for record in records], list(range(1, 11)))
+        self.assertAlmostEqual(records[9].physics.gas, 0.09, places=6)
+        self.assertAlmostEqual(records[9].position, 0.009, places=6)
+        self.assertEqual(records[0].graphics.tyreCompound, "Semislick")
+
+
+    def test_track(self):
+        recorder = TelemetryRecorder(self.fileName, BackgroundWriter(),
+                track="ks_nordschleife", trackConf="touristenfahrten", car="bmw_m3_e30")
+        self.drive(recorder, 3)
+        recorder.queueFlush()
+        self.assertEqual(readTelemetryTrack(self.fileName),
+                ("ks_nordschleife", "touristenfahrten", "bmw_m3_e30"))
+        self.assertEqual(len(list(readTelemetry(self.fileName))), 3)
+
+
+    def test_samePacketOnce(self):
+        recorder = TelemetryRecorder(self.fileName, BackgroundWriter())
+        snapshot = self.info.snapshot()
+        self.assertTrue(recorder.isNewPacket(snapshot))
+        recorder.record(snapshot, 0, 0, 0, 0.0, 0)
+        self.assertFalse(recorder.isNewPacket(self.info.snapshot()))
+
+
+    def test_dropsWhenFull(self):
+        recorder = TelemetryRecorder(self.fileName, IdleWriter(), 8, 4)
+        self.drive(recorder, 10)
+        self.assertEqual(recorder.dropped, 2)
+        recorder.flush()
+        self.assertEqual(len(list(readTelemetry(self.fileName))), 8)
+
+
+    def test_truncated(self):
+        recorder = TelemetryRecorder(self.fileName, BackgroundWriter())
+        self.drive(recorder, 3)
+        recorder.queueFlush()
+        with open(self.fileName, "r+b") as fd:
+            fd.truncate(os.path.getsize(self.fileName) - 1)
+        self.assertEqual(len(list(readTelemetry(self.fileName))), 2)
+
+
+    def test_otherWcharSize(self):
+        """
+        Pages recorded with another c_wchar size, as on Windows, are read.
+        """
+        wcharSize = 2 if ctypes.sizeof(ctypes.c_wchar) == 4 else 4
+        recorded = _recordedPage(SPageFileGraphic, wcharSize)()
+        recorded.status = AC_LIVE
+        recorded.iLastTime = 123456
+        recorded.tyreCompound[:2] = [ord("S"), ord("M")]
+        recorded.carCoordinates[:] = [1.0, 2.0, 3.0]
+
+        graphics = _pageReader(SPageFileGraphic, wcharSize)(bytes(recorded))
+        self.assertEqual(graphics.status, AC_LIVE)
+        self.assertEqual(graphics.iLastTime, 123456)
+        self.assertEqual(graphics.tyreCompound, "SM")
+        self.assertEqual(list(graphics.carCoordinates), [1.0, 2.0, 3.0])
@@ -0,0 +1,51 @@
+# python -m unittest test_TimeFormat
+import random
+import unittest
+
+from TimeFormat import timeToString, deltaToString
+
+
+def legacyTimeToString(time):
+    try:
+        if time <= 0:
+            return "-:--.---"
+        else:
+            return "{:d}:{:0>2d}.{:0>3d}".format(int(time/60000), int((time%60000)/1000), int(time%1000))
+    except Exception:
+        return "-:--.---"
+
+def legacyDeltaToString(time):
+    try:
+        return "{:+.3f}".format(float(time)/1000)
+    except Exception:
+        return "+0.000"
+
+
+class TestTimeFormat(unittest.TestCase):
+    """
+    The formatting must be the same as the original ``str.format`` based
+    functions, byte for byte.
+    """
+
+    def samples(self):
+        rng = random.Random(1)
+        values = list(range(-3000, 3000))
+        values += [rng.randint(-10**7, 10**7) for index in range(20000)]
+        values += [rng.uniform(-10**6, 10**6) for index in range(20000)]
+        values += [0.0, -0.0, 0.4, -0.4, 999.9999, 59999.9, 60000.0, 3599999]
+        return values
+
+
+    def test_timeToString(self):
+        for value in self.samples():
+            self.assertEqual(timeToString(value), legacyTimeToString(value), value)
+
+
+    def test_deltaToString(self):
+        for value in self.samples():
+            self.assertEqual(deltaToString(value), legacyDeltaToString(value), value)
+
+
+    def test_invalid(self):
+        self.assertEqual(timeToString(None), "-:--.---")
+        self.assertEqual(deltaToString(None), "+0.000")
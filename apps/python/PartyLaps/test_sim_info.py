@@ -0,0 +1,170 @@
+# python -m unittest test_sim_info
+import os
+import shutil
+import tempfile
+import unittest
+
+from PartyLaps_lib import sim_info
+from PartyLaps_lib.sim_info import SimInfo, LazySimInfo, BufferPages, FilePages
+from PartyLaps_lib.sim_info import SPageFilePhysics, copyPage, AC_LIVE
+
+
+class TestSnapshot(unittest.TestCase):
+    """
+    Tests for ``SimInfo.snapshot``.
+    """
+
+    def setUp(self):
+        self.info = SimInfo(BufferPages())
+
+    def tearDown(self):
+        self.info.close()
+
+
+    def test_copies(self):
+        self.info.physics.gas = 0.5
+        self.info.graphics.status = AC_LIVE
+        snapshot = self.info.snapshot()
+        self.info.physics.gas = 1.0
+        self.assertEqual(snapshot.physics.gas, 0.5)
+        self.assertEqual(snapshot.graphics.status, AC_LIVE)
+        self.assertTrue(snapshot.consistent)
+
+
+    def test_advanced(self):
+        self.assertTrue(self.info.snapshot().advanced)
+        self.assertFalse(self.info.snapshot().advanced)
+        self.info.graphics.packetId += 1
+        self.assertTrue(self.info.snapshot().advanced)
+        self.info.physics.packetId += 1
+        self.assertTrue(self.info.snapshot().advanced)
+        self.assertFalse(self.info.snapshot().advanced)
+
+
+    def test_sameObject(self):
+        self.assertIs(self.info.snapshot(), self.info.snapshot())
+
+
+class WritingPage(SPageFilePhysics):
+    """
+    A page which the game writes to while it is read, ``writes`` times.
+    """
+    _pack_ = 4
+    _fields_ = []
+
+    def __init__(self, writes):
+        SPageFilePhysics.__init__(self)
+        self.writes = writes
+
+    def __getattribute__(self, name):
+        value = SPageFilePhysics.__getattribute__(self, name)
+        if name == "packetId":
+            writes = SPageFilePhysics.__getattribute__(self, "writes")
+            if writes > 0:
+                self.writes = writes - 1
+                SPageFilePhysics.__setattr__(self, "packetId", value + 1)
+        return value
+
+
+class TestCopyPage(unittest.TestCase):
+    """
+    Tests for ``copyPage`` retrying torn copies.
+    """
+
+    def test_retried(self):
+        page = WritingPage(1)
+        copy = SPageFilePhysics()
+        self.assertTrue(copyPage(copy, page))
+        self.assertEqual(copy.packetId, page.packetId)
+
+
+    def test_torn(self):
+        page = WritingPage(sim_info.SNAPSHOT_RETRIES)
+        self.assertFalse(copyPage(SPageFilePhysics(), page))
+
+
+class TestFilePages(unittest.TestCase):
+    """
+    Tests for pages mapped from files.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+    def test_shared(self):
+        writer = SimInfo(FilePages(self.directory))
+        reader = SimInfo(FilePages(self.directory))
+        try:
+            writer.physics.packetId = 42
+            writer.static.maxRpm = 9000
+            self.assertEqual(reader.snapshot().physics.packetId, 42)
+            self.assertEqual(reader.static.maxRpm, 9000)
+        finally:
+            writer.close()
+            reader.close()
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                ["acpmf_graphics", "acpmf_physics", "acpmf_static"])
+
+
+class TestLazySimInfo(unittest.TestCase):
+    """
+    Tests for ``LazySimInfo``.
+    """
+
+    def test_configure(self):
+        info = LazySimInfo()
+        info.configure(BufferPages())
+        try:
+            info.physics.rpms = 7000
+            self.assertEqual(info.snapshot().physics.rpms, 7000)
+        finally:
+            info.close()
+        self.assertIsNone(info._info)
+
+
+    def test_closed(self):
+        """
+        A closed info does not open the game's pages behind the back of the
+        caller, until it is configured again.
+        """
+        info = LazySimInfo()
+        info.configure(BufferPages())
+        info.close()
+        self.assertRaises(ValueError, lambda: info.physics)
+
+        info.configure(BufferPages())
+        try:
+            self.assertEqual(info.physics.rpms, 0)
+        finally:
+            info.close()
+
+
+class TestSimInfo(unittest.TestCase):
+    """
+    Tests for ``SimInfo``.
+    """
+
+    class ShortPages(object):
+        def __init__(self):
+            self.buffers = BufferPages().buffers
+            self.buffers["static"] = bytearray(1)
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+
+    def test_failedOpen(self):
+        """
+        An info whose pages could not be mapped can still be closed, as its
+        finaliser does, and leaves the backend alone.
+        """
+        pages = self.ShortPages()
+        info = SimInfo.__new__(SimInfo)
+        self.assertRaises(ValueError, info.__init__, pages)
+        info.close()
+        self.assertFalse(pages.closed)